@@ -0,0 +1,13 @@
+import logging
+import os
+import tempfile
+
+from benchmarks._server import DEFAULT_ENV
+
+_directory = tempfile.mkdtemp(prefix="fast_zero_bench_")
+
+for key, value in DEFAULT_ENV.items():
+    os.environ.setdefault(key, value)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_directory}/database.db")
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -0,0 +1,102 @@
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_ENV = {
+    "SECRET_KEY": "benchmark-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_LIFETIME": "60",
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(database_url: str, **overrides):
+    env = {**os.environ, **DEFAULT_ENV, "DATABASE_URL": database_url}
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def migrate(source: Path, env: dict):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=source,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+
+
+@contextlib.contextmanager
+def temporary_database():
+    with tempfile.TemporaryDirectory(prefix="fast_zero_bench_") as directory:
+        yield f"sqlite:///{directory}/database.db"
+
+
+@contextlib.contextmanager
+def git_worktree(ref: str):
+    with tempfile.TemporaryDirectory(prefix="fast_zero_ref_") as directory:
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", directory, ref],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+        )
+        try:
+            yield Path(directory)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", directory], cwd=ROOT, check=False)
+
+
+@contextlib.contextmanager
+def serve(source: Path, env: dict, workers: int = 1, timeout: float = 30.0):
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "fast_zero.app:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=source,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                httpx.get(f"{base_url}/openapi.json", timeout=1.0)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
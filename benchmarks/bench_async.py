@@ -0,0 +1,105 @@
+"""Compare requests/sec of the async database path against another git ref.
+
+Usage:
+    python -m benchmarks.bench_async --clients 256 --duration 10 --compare-ref <sync-ref>
+
+Each target gets its own SQLite file, is migrated with alembic, seeded through
+the API and then hammered by ``--clients`` concurrent connections.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import time
+
+import httpx
+
+from benchmarks._server import ROOT, git_worktree, migrate, serve, server_env, temporary_database
+
+PASSWORD = "benchmark"
+
+
+async def seed(base_url: str, todos: int):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        await client.post(
+            "/users/",
+            json={"username": "bench", "email": "bench@bench.com", "password": PASSWORD},
+        )
+        response = await client.post("/auth/token", data={"username": "bench@bench.com", "password": PASSWORD})
+        token = response.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for index in range(todos):
+            await client.post(
+                "/todos/",
+                headers=headers,
+                json={"title": f"todo {index}", "description": "benchmark", "state": "todo"},
+            )
+
+    return headers
+
+
+async def hammer(base_url: str, path: str, headers: dict, clients: int, duration: float):
+    completed = 0
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal completed, errors
+            while time.perf_counter() < deadline:
+                try:
+                    response = await client.get(path)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code == httpx.codes.OK:
+                    completed += 1
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    return completed / elapsed, errors
+
+
+def run_target(label: str, source, args):
+    results = {}
+
+    with temporary_database() as database_url:
+        env = server_env(database_url)
+        migrate(source, env)
+
+        with serve(source, env, workers=args.workers) as base_url:
+            headers = asyncio.run(seed(base_url, args.todos))
+            for path in ("/users/", "/todos/"):
+                rps, errors = asyncio.run(hammer(base_url, path, headers, args.clients, args.duration))
+                results[path] = (rps, errors)
+
+    for path, (rps, errors) in results.items():
+        print(f"{label:<24} GET {path:<10} {rps:>10.1f} req/s {errors:>6} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--todos", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--compare-ref", help="git ref to benchmark side by side, e.g. the last sync commit")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        if args.compare_ref:
+            source = stack.enter_context(git_worktree(args.compare_ref))
+            run_target(args.compare_ref, source, args)
+
+        run_target("working tree", ROOT, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Serialization cost of GET /todos/: FastAPI's default path vs FAST_JSON_RESPONSES.
+
+Usage:
+    python -m benchmarks.bench_json --sizes 10 100 1000 10000
+
+Seeds one user with max(--sizes) todos in a temporary SQLite file. For each
+page size it reports the median end-to-end latency of GET /todos/?limit=N
+through the ASGI app in-process, and the serialization time alone for the
+same ORM rows:
+
+* default: response_model validation, jsonable_encoder and stdlib json
+* fast: orjson over the column rows
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import benchmarks._inprocess  # noqa: F401  isort: skip
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.bench_pagination import seed
+from fast_zero.app import app
+from fast_zero.database import engine
+from fast_zero.security import create_access_token
+from fast_zero.todos import routes as todo_routes
+from fast_zero.todos.models import Todo
+from fast_zero.todos.routes import TODO_RESPONSE_COLUMNS, dump_todo_list
+
+
+async def median_ms(func, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def median_request_ms(client: httpx.AsyncClient, url: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(timings) * 1000, response.json()
+
+
+async def main(args):
+    await seed(max(args.sizes))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench@bench.com'})}"}
+    [route] = [route for route in app.routes if getattr(route, "endpoint", None) is todo_routes.list_todo]
+
+    async with AsyncSession(engine) as session:
+        rows = [row._asdict() for row in await session.execute(select(*TODO_RESPONSE_COLUMNS).order_by(Todo.id))]
+
+    transport = httpx.ASGITransport(app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        print(f"{'items':>6} {'default ms':>11} {'fast ms':>9} {'speedup':>8}   {'encode default':>14} {'fast':>6}")
+        for size in args.sizes:
+            url = f"/todos/?limit={size}"
+            todo_list = {"todos": rows[:size], "next_cursor": None}
+
+            todo_routes.settings.FAST_JSON_RESPONSES = False
+            default_ms, default_body = await median_request_ms(client, url, args.repeat)
+            todo_routes.settings.FAST_JSON_RESPONSES = True
+            fast_ms, fast_body = await median_request_ms(client, url, args.repeat)
+
+            if default_body != fast_body:
+                raise SystemExit(f"fast path changed the response body at {size} items")
+
+            async def encode_default(todo_list=todo_list):
+                JSONResponse(await serialize_response(field=route.response_field, response_content=todo_list))
+
+            async def encode_fast(todo_list=todo_list):
+                dump_todo_list(todo_list["todos"], todo_list["next_cursor"])
+
+            encode_default_ms = await median_ms(encode_default, args.repeat)
+            encode_fast_ms = await median_ms(encode_fast, args.repeat)
+            print(
+                f"{size:>6} {default_ms:>11.2f} {fast_ms:>9.2f} {default_ms / fast_ms:>7.1f}x"
+                f"   {encode_default_ms:>14.2f} {encode_fast_ms:>6.2f}"
+            )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
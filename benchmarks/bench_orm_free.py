@@ -0,0 +1,133 @@
+"""Latency and memory of large list pages: ORM entities vs Core column rows.
+
+Usage:
+    python -m benchmarks.bench_orm_free --sizes 1000 10000 50000
+
+Seeds one user with max(--sizes) todos, plus the same number of users, in a
+temporary SQLite file. For each page size it loads and serializes the page
+the way GET /todos/ and GET /users/ used to (select(Todo) entities validated
+by the response_model) and the way they do now (only the response columns,
+as plain rows), and reports the median wall time and the tracemalloc peak.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+import benchmarks._inprocess  # noqa: F401  isort: skip
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.bench_pagination import seed
+from fast_zero.app import app
+from fast_zero.database import engine
+from fast_zero.todos import routes as todo_routes
+from fast_zero.todos.models import Todo
+from fast_zero.todos.routes import TODO_RESPONSE_COLUMNS, dump_todo_list
+from fast_zero.users.models import User
+from fast_zero.users.routes import USER_RESPONSE_COLUMNS
+from fast_zero.users.schema import UserList
+
+
+async def seed_users(users: int):
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {"username": f"user{index}", "email": f"user{index}@bench.com", "password": "-"}
+                for index in range(users)
+            ],
+        )
+
+
+def response_field(endpoint):
+    [route] = [route for route in app.routes if getattr(route, "endpoint", None) is endpoint]
+    return route.response_field
+
+
+async def todos_orm(size: int):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        todos = (await session.scalars(select(Todo).order_by(Todo.id).limit(size))).all()
+        content = {"todos": todos, "next_cursor": None}
+        return JSONResponse(
+            await serialize_response(field=response_field(todo_routes.list_todo), response_content=content)
+        )
+
+
+async def todos_core(size: int):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        rows = await session.execute(select(*TODO_RESPONSE_COLUMNS).order_by(Todo.id).limit(size))
+        content = {"todos": [row._asdict() for row in rows], "next_cursor": None}
+        return JSONResponse(
+            await serialize_response(field=response_field(todo_routes.list_todo), response_content=content)
+        )
+
+
+async def todos_core_fast(size: int):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        rows = await session.execute(select(*TODO_RESPONSE_COLUMNS).order_by(Todo.id).limit(size))
+        return dump_todo_list([row._asdict() for row in rows], None)
+
+
+async def users_orm(size: int):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        users = (await session.scalars(select(User).limit(size))).all()
+        return UserList.model_validate({"users": users}, from_attributes=True).model_dump_json()
+
+
+async def users_core(size: int):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        rows = await session.execute(select(*USER_RESPONSE_COLUMNS).limit(size))
+        return orjson.dumps({"users": [row._asdict() for row in rows]})
+
+
+VARIANTS = {
+    "todos orm": todos_orm,
+    "todos core": todos_core,
+    "todos core+orjson": todos_core_fast,
+    "users orm": users_orm,
+    "users core": users_core,
+}
+
+
+async def measure(variant, size: int, repeat: int):
+    await variant(size)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await variant(size)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await variant(size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(timings) * 1000, peak / 2**20
+
+
+async def main(args):
+    await seed(max(args.sizes))
+    await seed_users(max(args.sizes))
+
+    print(f"{'variant':<18} {'items':>7} {'median ms':>10} {'peak MiB':>9}")
+    for size in args.sizes:
+        for name, variant in VARIANTS.items():
+            elapsed_ms, peak_mib = await measure(variant, size, args.repeat)
+            print(f"{name:<18} {size:>7} {elapsed_ms:>10.2f} {peak_mib:>9.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
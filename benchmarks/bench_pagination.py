@@ -0,0 +1,82 @@
+"""Latency of deep GET /todos/ pages: offset pagination vs cursor pagination.
+
+Usage:
+    python -m benchmarks.bench_pagination --todos 100000 --page-size 100
+
+Seeds one user with ``--todos`` rows in a temporary SQLite file and requests
+pages 1, 10, 100 and 1000 through the ASGI app in-process.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import benchmarks._inprocess  # noqa: F401  isort: skip
+
+import httpx
+from sqlalchemy import insert
+
+from fast_zero.app import app
+from fast_zero.database import engine, model_registry
+from fast_zero.security import create_access_token
+from fast_zero.todos.models import Todo, TodoState
+from fast_zero.todos.routes import encode_cursor
+from fast_zero.users.models import User
+
+
+async def seed(todos: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(model_registry.metadata.drop_all)
+        await conn.run_sync(model_registry.metadata.create_all)
+        await conn.execute(insert(User), [{"username": "bench", "email": "bench@bench.com", "password": "-"}])
+        await conn.execute(
+            insert(Todo),
+            [
+                {"title": f"todo {index}", "description": "benchmark", "state": TodoState.todo, "user_id": 1}
+                for index in range(todos)
+            ],
+        )
+
+
+async def measure(client: httpx.AsyncClient, url: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(timings) * 1000
+
+
+async def main(args):
+    await seed(args.todos)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench@bench.com'})}"}
+
+    transport = httpx.ASGITransport(app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        print(f"{'page':>6} {'offset ms':>12} {'cursor ms':>12}")
+        for page in (1, 10, 100, 1000):
+            skipped = (page - 1) * args.page_size
+            if skipped >= args.todos:
+                break
+
+            offset_url = f"/todos/?offset={skipped}&limit={args.page_size}"
+            cursor_url = f"/todos/?limit={args.page_size}"
+            if skipped:
+                cursor_url += f"&after={encode_cursor(skipped)}"
+
+            offset_ms = await measure(client, offset_url, args.repeat)
+            cursor_ms = await measure(client, cursor_url, args.repeat)
+            print(f"{page:>6} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--todos", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
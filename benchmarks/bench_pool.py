@@ -0,0 +1,120 @@
+"""Throughput of GET /todos/ per connection pool size, with and without early session release.
+
+Usage:
+    python -m benchmarks.bench_pool --pool-sizes 1 2 4 8 16 --concurrency 64 --page-size 500
+
+Seeds one user with ``--page-size`` todos in a temporary SQLite file and, for
+every pool size (``max_overflow=0``), drives ``--concurrency`` in-process
+clients for ``--duration`` seconds. "release" is the SessionRoute behaviour,
+which returns the connection when the endpoint returns; "hold" keeps it until
+the response has been serialized.
+
+Besides req/s, the mean time a connection stays checked out per request is
+reported. Larger pools inflate it with time spent waiting on the event loop,
+so the shortest hold time is taken as the per-request cost; by Little's law
+the pool needed for the best throughput of each mode is req/s * hold time.
+"""
+
+import argparse
+import asyncio
+import math
+import time
+
+import benchmarks._inprocess  # noqa: F401  isort: skip
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.bench_pagination import seed
+from fast_zero import database, routing
+from fast_zero.app import app
+from fast_zero.database import build_engine, release_sessions
+from fast_zero.security import create_access_token
+
+
+async def hold_sessions():
+    pass
+
+
+def track_hold_times(engine):
+    started = {}
+    held = []
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        started[id(connection_record)] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        start = started.pop(id(connection_record), None)
+        if start is not None:
+            held.append(time.perf_counter() - start)
+
+    return held
+
+
+async def hammer(client: httpx.AsyncClient, url: str, concurrency: int, duration: float):
+    completed = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            response = await client.get(url)
+            response.raise_for_status()
+            completed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return completed / (time.perf_counter() - start)
+
+
+async def run(client: httpx.AsyncClient, mode: str, pool_size: int, args):
+    database.engine = build_engine(
+        str(database.settings.DATABASE_URL), name=f"{mode}-{pool_size}", pool_size=pool_size, max_overflow=0
+    )
+    routing.release_sessions = release_sessions if mode == "release" else hold_sessions
+    held = track_hold_times(database.engine)
+
+    try:
+        rps = await hammer(client, f"/todos/?limit={args.page_size}", args.concurrency, args.duration)
+    finally:
+        await database.engine.dispose()
+
+    return rps, sum(held) / max(len(held), 1)
+
+
+async def main(args):
+    seed_engine = database.engine
+    await seed(args.page_size)
+    await seed_engine.dispose()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench@bench.com'})}"}
+    transport = httpx.ASGITransport(app)
+    modes = ("release", "hold")
+    best_rps = dict.fromkeys(modes, 0.0)
+    min_held = dict.fromkeys(modes, math.inf)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+        print(f"{'pool':>6} {'release req/s':>14} {'held ms':>9} {'hold req/s':>12} {'held ms':>9}")
+        for pool_size in args.pool_sizes:
+            row = []
+            for mode in modes:
+                rps, held = await run(client, mode, pool_size, args)
+                best_rps[mode] = max(best_rps[mode], rps)
+                min_held[mode] = min(min_held[mode], held)
+                row += [rps, held * 1000]
+            print(f"{pool_size:>6} {row[0]:>14.1f} {row[1]:>9.2f} {row[2]:>12.1f} {row[3]:>9.2f}")
+
+    for mode in modes:
+        rps, held = best_rps[mode], min_held[mode]
+        print(f"required pool size ({mode}): {rps * held:.2f} connections for {rps:.1f} req/s at {held * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,141 @@
+"""Microbenchmarks for the security.py hot paths with regression thresholds.
+
+Usage:
+    python -m benchmarks.bench_security                 # compare against the stored baseline
+    python -m benchmarks.bench_security --update        # store the current results as baseline
+    python -m benchmarks.bench_security --max-regression 15
+
+Covers create_access_token and the jwt.decode done by get_current_user for
+HS256/HS512/EdDSA (EdDSA needs the ``cryptography`` package), and password
+hashing/verification for several argon2 cost settings. The median of each
+case is compared to the baseline and the run exits 1 when any case is slower
+by more than ``--max-regression`` percent.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import benchmarks._inprocess  # noqa: F401  isort: skip
+
+from jwt import decode
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from fast_zero import security
+
+DEFAULT_BASELINE = Path(".benchmarks/security.json")
+
+ARGON2_PROFILES = {
+    "owasp-min": {"time_cost": 2, "memory_cost": 19_456, "parallelism": 1},
+    "pwdlib-default": {"time_cost": 3, "memory_cost": 65_536, "parallelism": 4},
+    "hardened": {"time_cost": 4, "memory_cost": 131_072, "parallelism": 4},
+}
+
+
+def jwt_keys(algorithm: str):
+    if algorithm.startswith("HS"):
+        return "benchmark-secret-key-with-enough-entropy", "benchmark-secret-key-with-enough-entropy"
+
+    try:
+        from cryptography.hazmat.primitives import serialization  # noqa: PLC0415
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey  # noqa: PLC0415
+    except ImportError:
+        return None
+
+    private_key = Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem, public_pem
+
+
+def measure(func, repeat: int, number: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def jwt_cases(repeat: int):
+    for algorithm in ("HS256", "HS512", "EdDSA"):
+        keys = jwt_keys(algorithm)
+        if keys is None:
+            print(f"skipping {algorithm}: install cryptography to benchmark it", file=sys.stderr)
+            continue
+
+        signing_key, verifying_key = keys
+        with mock.patch.multiple(security.settings, ALGORITHM=algorithm, SECRET_KEY=signing_key):
+            yield (
+                f"create_access_token[{algorithm}]",
+                measure(lambda: security.create_access_token({"sub": "bench@bench.com"}), repeat, 1_000),
+            )
+            token = security.create_access_token({"sub": "bench@bench.com"})
+
+        yield (
+            f"jwt.decode[{algorithm}]",
+            measure(lambda: decode(token, verifying_key, algorithms=[algorithm]), repeat, 1_000),
+        )
+
+
+def argon2_cases(repeat: int):
+    for name, parameters in ARGON2_PROFILES.items():
+        context = PasswordHash((Argon2Hasher(**parameters),))
+        hashed = context.hash("benchmark")
+
+        with mock.patch("fast_zero.hashing.pwd_context", context):
+            yield f"get_password_hash[{name}]", measure(lambda: security.hash_password("benchmark"), repeat, 3)
+            yield f"verify_password[{name}]", measure(lambda: security.check_password("benchmark", hashed), repeat, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed median slowdown in %%")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+
+    results = {}
+    regressions = []
+    print(f"{'case':<36} {'median':>12} {'baseline':>12} {'change':>8}")
+
+    for name, median in (*jwt_cases(args.repeat), *argon2_cases(args.repeat)):
+        results[name] = median
+        previous = baseline.get(name)
+        change = ""
+        if previous:
+            percent = (median - previous) / previous * 100
+            change = f"{percent:+.1f}%"
+            if percent > args.max_regression:
+                regressions.append(name)
+        print(f"{name:<36} {median * 1e6:>10.1f}µs {(previous or 0) * 1e6:>10.1f}µs {change:>8}")
+
+    if args.update or not baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+    elif regressions:
+        print(f"median regressed more than {args.max_regression}% on: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
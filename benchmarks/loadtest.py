@@ -0,0 +1,284 @@
+"""HTTP load test for every endpoint against a real uvicorn server.
+
+Usage:
+    python -m benchmarks.loadtest --users 200 --todos-per-user 500 --concurrency 64 --duration 30 \\
+        --output baseline.json
+    python -m benchmarks.loadtest ... --compare baseline.json --max-regression 15
+
+The server is booted from the working tree against a file-backed SQLite
+database (or ``--database-url``), migrated with alembic and seeded directly
+through SQLAlchemy. Virtual clients then run a weighted mix of routes at a
+fixed concurrency and p50/p95/p99 latency and RPS are reported per route.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import benchmarks._inprocess  # noqa: F401  isort: skip
+
+import httpx
+from sqlalchemy import create_engine, insert, select
+
+from benchmarks._server import ROOT, migrate, serve, server_env, temporary_database
+from fast_zero.hashing import hash_password
+from fast_zero.security import create_access_token
+from fast_zero.todos.models import Todo, TodoState
+from fast_zero.users.models import User
+
+PASSWORD = "loadtest"
+WORDS = ["buy", "milk", "call", "review", "deploy", "fix", "write", "report", "plan", "meeting"]
+
+DEFAULT_MIX = "login=1,list=6,list_filtered=3,search=2,users=2,detail=2,create=2,patch=2,delete=1"
+
+
+def seed(database_url: str, users: int, todos_per_user: int, rng: random.Random):
+    engine = create_engine(database_url)
+    hashed = hash_password(PASSWORD)
+    states = list(TodoState)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {"username": f"load{index}", "email": f"load{index}@load.com", "password": hashed}
+                for index in range(users)
+            ],
+        )
+        user_ids = list(conn.scalars(select(User.id).order_by(User.id)))
+
+        for user_id in user_ids:
+            conn.execute(
+                insert(Todo),
+                [
+                    {
+                        "title": " ".join(rng.sample(WORDS, 3)),
+                        "description": " ".join(rng.sample(WORDS, 5)),
+                        "state": rng.choice(states),
+                        "user_id": user_id,
+                    }
+                    for _ in range(todos_per_user)
+                ],
+            )
+
+        todo_ids = defaultdict(list)
+        for user_id, todo_id in conn.execute(select(Todo.user_id, Todo.id)):
+            todo_ids[user_id].append(todo_id)
+
+    engine.dispose()
+    return user_ids, todo_ids
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, user_ids: list[int], todo_ids: dict, rng: random.Random):
+        self.client = client
+        self.user_ids = user_ids
+        self.todo_ids = todo_ids
+        self.rng = rng
+        self.tokens = {
+            user_id: create_access_token({"sub": f"load{index}@load.com"}) for index, user_id in enumerate(user_ids)
+        }
+
+    def _auth(self):
+        user_id = self.rng.choice(self.user_ids)
+        return user_id, {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    async def login(self):
+        index = self.rng.randrange(len(self.user_ids))
+        return await self.client.post("/auth/token", data={"username": f"load{index}@load.com", "password": PASSWORD})
+
+    async def list(self):
+        _, headers = self._auth()
+        return await self.client.get("/todos/?limit=20", headers=headers)
+
+    async def list_filtered(self):
+        _, headers = self._auth()
+        state = self.rng.choice(list(TodoState)).value
+        return await self.client.get(f"/todos/?state={state}&limit=20", headers=headers)
+
+    async def search(self):
+        _, headers = self._auth()
+        return await self.client.get(f"/todos/?q={self.rng.choice(WORDS)}&limit=20", headers=headers)
+
+    async def users(self):
+        return await self.client.get(f"/users/?skip={self.rng.randrange(len(self.user_ids))}&limit=20")
+
+    async def detail(self):
+        return await self.client.get(f"/users/{self.rng.choice(self.user_ids)}")
+
+    async def create(self):
+        user_id, headers = self._auth()
+        response = await self.client.post(
+            "/todos/",
+            headers=headers,
+            json={"title": "load test", "description": "created by the load test", "state": "todo"},
+        )
+        if response.status_code == httpx.codes.OK:
+            self.todo_ids[user_id].append(response.json()["id"])
+        return response
+
+    async def patch(self):
+        user_id, headers = self._auth()
+        if not self.todo_ids[user_id]:
+            return await self.create()
+        todo_id = self.rng.choice(self.todo_ids[user_id])
+        return await self.client.patch(f"/todos/{todo_id}", headers=headers, json={"state": "doing"})
+
+    async def delete(self):
+        user_id, headers = self._auth()
+        if not self.todo_ids[user_id]:
+            return await self.create()
+        todo_ids = self.todo_ids[user_id]
+        todo_id = todo_ids.pop(self.rng.randrange(len(todo_ids)))
+        return await self.client.delete(f"/todos/{todo_id}", headers=headers)
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if not hasattr(Workload, name):
+            raise SystemExit(f"unknown route in --mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def summarize(timings: dict, errors: dict, elapsed: float):
+    routes = {}
+    for name in sorted(set(timings) | set(errors)):
+        samples = timings.get(name, [])
+        cuts = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+        routes[name] = {
+            "count": len(samples),
+            "errors": errors.get(name, 0),
+            "rps": len(samples) / elapsed,
+            "p50_ms": cuts[49] * 1000 if cuts else None,
+            "p95_ms": cuts[94] * 1000 if cuts else None,
+            "p99_ms": cuts[98] * 1000 if cuts else None,
+        }
+    return routes
+
+
+async def drive(base_url: str, args, user_ids, todo_ids, rng):
+    weights = parse_mix(args.mix)
+    names, cumulative = list(weights), list(weights.values())
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        workload = Workload(client, user_ids, todo_ids, rng)
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, cumulative)[0]
+                start = time.perf_counter()
+                try:
+                    response = await getattr(workload, name)()
+                except httpx.HTTPError:
+                    errors[name] += 1
+                    continue
+                if response.is_success:
+                    timings[name].append(time.perf_counter() - start)
+                else:
+                    errors[name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(timings, errors, elapsed), elapsed
+
+
+def git_revision():
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return result.stdout.strip() or None
+
+
+def report(routes: dict, baseline: dict | None, max_regression: float | None):
+    regressions = []
+    print(f"{'route':<14} {'count':>8} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Δp95':>8}")
+
+    for name, stats in routes.items():
+        delta = ""
+        previous = (baseline or {}).get("routes", {}).get(name)
+        if previous and previous["p95_ms"] and stats["p95_ms"]:
+            change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            delta = f"{change:+.1f}%"
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+
+        print(
+            f"{name:<14} {stats['count']:>8} {stats['errors']:>7} {stats['rps']:>9.1f} "
+            f"{stats['p50_ms'] or 0:>9.2f} {stats['p95_ms'] or 0:>9.2f} {stats['p99_ms'] or 0:>9.2f} {delta:>8}"
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--todos-per-user", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted routes, default: {DEFAULT_MIX}")
+    parser.add_argument("--database-url", help="sync SQLAlchemy URL; defaults to a temporary SQLite file")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare p95 against")
+    parser.add_argument("--max-regression", type=float, help="exit 1 when a route's p95 regresses more than this %%")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    with temporary_database() as temporary_url:
+        database_url = args.database_url or temporary_url
+        env = server_env(database_url)
+        migrate(ROOT, env)
+        user_ids, todo_ids = seed(database_url, args.users, args.todos_per_user, rng)
+
+        with serve(ROOT, env, workers=args.workers) as base_url:
+            routes, elapsed = asyncio.run(drive(base_url, args, user_ids, todo_ids, rng))
+
+    regressions = report(routes, baseline, args.max_regression)
+    total = sum(stats["count"] for stats in routes.values())
+    print(f"\n{total} requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s overall")
+
+    if args.output:
+        result = {
+            "revision": git_revision(),
+            "config": {
+                key: getattr(args, key)
+                for key in ("users", "todos_per_user", "concurrency", "duration", "workers", "mix")
+            },
+            "routes": routes,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+    if regressions:
+        print(f"p95 regressed more than {args.max_regression}% on: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
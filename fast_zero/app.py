@@ -1,10 +1,60 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from fast_zero import database
 from fast_zero.auth.routes import auth_router
+from fast_zero.config.settings import Settings
+from fast_zero.hashing import hash_executor
+from fast_zero.metrics import write_snapshot
+from fast_zero.monitoring.instrumentation import MetricsMiddleware, QueryCountMiddleware, flush_metrics
+from fast_zero.monitoring.routes import monitoring_router
+from fast_zero.monitoring.slow_queries import slow_query_log
+from fast_zero.profiling import ProfilingMiddleware
+from fast_zero.todos import shards
 from fast_zero.todos.routes import todo_router
 from fast_zero.users.routes import user_router
 
-app = FastAPI()
+settings = Settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    flusher = None
+    if settings.METRICS_MULTIPROC_DIR:
+        flusher = asyncio.create_task(flush_metrics(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL))
+
+    yield
+
+    await asyncio.gather(*slow_query_log.pending, return_exceptions=True)
+    if flusher is not None:
+        flusher.cancel()
+        write_snapshot(settings.METRICS_MULTIPROC_DIR)
+    hash_executor.shutdown()
+    # pooled aiosqlite connections run on non-daemon threads that keep the process alive
+    for engine in (database.engine, *database.replica_engines, *shards.shard_engines):
+        await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(todo_router)
+app.include_router(monitoring_router)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILING_DIR,
+        header=settings.PROFILING_HEADER,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        max_bytes=settings.PROFILING_MAX_BYTES,
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if settings.DEBUG:
+    app.add_middleware(QueryCountMiddleware, header=settings.QUERY_COUNT_HEADER)
@@ -1,23 +1,24 @@
 from fastapi import APIRouter, status
 from fastapi.exceptions import HTTPException
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from fast_zero.auth.schema import Token
+from fast_zero.routing import SessionRoute
 from fast_zero.security import create_access_token, verify_password
 from fast_zero.types import T_CurrentUser, T_OAuth2Form, T_Session
 from fast_zero.users.models import User
 
-auth_router = APIRouter(prefix="/auth", tags=["auth"])
+auth_router = APIRouter(prefix="/auth", tags=["auth"], route_class=SessionRoute)
 
 
 @auth_router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     session: T_Session,
     form_data: T_OAuth2Form,
 ):
-    exist_user = session.scalar(select(User).where(User.email == form_data.username))
+    exist_user = await session.scalar(select(User).where(func.lower(User.email) == form_data.username.lower()))
 
-    if not exist_user or not verify_password(form_data.password, exist_user.password):
+    if not exist_user or not await verify_password(form_data.password, exist_user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password",
@@ -32,6 +33,6 @@ def login_for_access_token(
 
 
 @auth_router.post("/refresh_token", response_model=Token)
-def refresh_access_token(user: T_CurrentUser):
+async def refresh_access_token(user: T_CurrentUser):
     new_access_token = create_access_token(data={"sub": user.email})
     return {"access_token": new_access_token, "token_type": "Bearer"}
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from fast_zero.metrics import Counter
+
+CACHE_REQUESTS = Counter("fast_zero_cache_requests_total", "Cache lookups by result", labelnames=("cache", "result"))
+CACHE_EVICTIONS = Counter(
+    "fast_zero_cache_evictions_total",
+    "Entries evicted to respect maxsize",
+    labelnames=("cache",),
+)
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._hits = CACHE_REQUESTS.labels(cache=name, result="hit")
+        self._misses = CACHE_REQUESTS.labels(cache=name, result="miss")
+        self._evictions = CACHE_EVICTIONS.labels(cache=name)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                self.delete(key)
+            self._misses.inc()
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry[0]
+
+    def set(self, key, value, ttl: float, tag=None):
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self.delete(key)
+        self._entries[key] = (value, time.time() + ttl, tag)
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.maxsize:
+            self.delete(next(iter(self._entries)))
+            self._evictions.inc()
+
+    def delete(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None and entry[2] is not None:
+            keys = self._tags.get(entry[2])
+            keys.discard(key)
+            if not keys:
+                del self._tags[entry[2]]
+
+    def invalidate(self, tag):
+        for key in self._tags.pop(tag, set()):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+
+class MemoryBackend:
+    def __init__(self, name: str, maxsize: int):
+        self.entries = TTLCache(name, maxsize)
+        # tag -> (generation, forget at), oldest bump first
+        self._generations = OrderedDict()
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.entries.set(key, value, ttl)
+
+    def generation(self, tag: str):
+        return self._generations.get(tag, ("0", 0))[0]
+
+    def bump(self, tag: str, keep: float):
+        now = time.time()
+        self._generations.pop(tag, None)
+        self._generations[tag] = (f"{time.time_ns()}", now + keep)
+
+        while self._generations:
+            oldest = next(iter(self._generations))
+            if self._generations[oldest][1] > now:
+                break
+            del self._generations[oldest]
+
+    def clear(self):
+        self.entries.clear()
+        self._generations.clear()
+
+
+class SharedMemoryBackend:
+    # one file per entry on a tmpfs, shared by every worker on the host;
+    # the file mtime is the expiry time
+    def __init__(self, name: str, maxsize: int, directory: str):
+        self.name = name
+        self.maxsize = maxsize
+        self.entries = Path(directory) / name / "entries"
+        self.tags = Path(directory) / name / "tags"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.tags.mkdir(parents=True, exist_ok=True)
+        self._writes = 0
+        self._hits = CACHE_REQUESTS.labels(cache=name, result="hit")
+        self._misses = CACHE_REQUESTS.labels(cache=name, result="miss")
+        self._evictions = CACHE_EVICTIONS.labels(cache=name)
+
+    @staticmethod
+    def _filename(key: str):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _write(path: Path, value: bytes, mtime: float | None = None):
+        temporary = path.with_name(f".{path.name}.{os.getpid()}")
+        temporary.write_bytes(value)
+        if mtime is not None:
+            os.utime(temporary, (mtime, mtime))
+        os.replace(temporary, path)
+
+    def get(self, key: str):
+        try:
+            with open(self.entries / self._filename(key), "rb") as entry:
+                if os.fstat(entry.fileno()).st_mtime > time.time():
+                    self._hits.inc()
+                    return entry.read()
+        except FileNotFoundError:
+            pass
+
+        self._misses.inc()
+        return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._write(self.entries / self._filename(key), value, time.time() + ttl)
+
+        self._writes += 1
+        if self._writes % max(self.maxsize // 8, 1) == 0:
+            self.prune()
+
+    def prune(self):
+        now = time.time()
+        for path in self.tags.iterdir():
+            try:
+                if path.stat().st_mtime <= now:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+        entries = []
+        for path in self.entries.iterdir():
+            try:
+                expires = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if expires <= now:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((expires, path))
+
+        for _, path in sorted(entries)[: max(len(entries) - self.maxsize, 0)]:
+            path.unlink(missing_ok=True)
+            self._evictions.inc()
+
+    def generation(self, tag: str):
+        try:
+            return (self.tags / self._filename(tag)).read_text()
+        except FileNotFoundError:
+            return "0"
+
+    def bump(self, tag: str, keep: float):
+        # unique rather than incremented, so concurrent bumps from two workers never collide;
+        # like entries, the mtime is when prune() may forget it
+        self._write(self.tags / self._filename(tag), f"{os.getpid()}-{time.time_ns()}".encode(), time.time() + keep)
+
+    def clear(self):
+        for directory in (self.entries, self.tags):
+            for path in directory.iterdir():
+                path.unlink(missing_ok=True)
+
+
+RESPONSE_BACKENDS = {
+    "memory": lambda name, maxsize, directory: MemoryBackend(name, maxsize),
+    "shared": SharedMemoryBackend,
+}
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str | None = None
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._fills = {}
+
+    def _load(self, key: str, tags: tuple[str, ...]):
+        value = self.backend.get(key)
+        if value is None:
+            return None
+
+        header, body = value.split(b"\n", 1)
+        header = json.loads(header)
+        if header["generations"] != [self.backend.generation(tag) for tag in tags]:
+            return None
+        return CachedResponse(body, header["etag"])
+
+    async def get_or_fill(self, key: str, tags: tuple[str, ...], fill):
+        cached = self._load(key, tags)
+        if cached is not None:
+            return cached
+
+        # single flight: the first miss fills the entry while concurrent misses wait for it
+        lock = self._fills.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                cached = self._load(key, tags)
+                if cached is not None:
+                    return cached
+
+                # read before filling, so an invalidation that races the fill makes the entry stale
+                generations = [self.backend.generation(tag) for tag in tags]
+                cached = await fill()
+                header = json.dumps({"etag": cached.etag, "generations": generations}).encode()
+                self.backend.set(key, header + b"\n" + cached.body, self.ttl)
+                return cached
+        finally:
+            if not lock.locked():
+                self._fills.pop(key, None)
+
+    def invalidate(self, *tags: str):
+        # entries stamped before a bump can still be written by a fill in flight and then live one ttl,
+        # so after two ttls none is left and the bump can be forgotten
+        for tag in tags:
+            self.backend.bump(tag, 2 * self.ttl)
+
+    def clear(self):
+        self.backend.clear()
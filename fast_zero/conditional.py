@@ -0,0 +1,29 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def weak_etag(*parts):
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str):
+    # ETag only: Last-Modified has second precision and cannot see deletes in a collection
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    # weak comparison
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def conditional_response(request: Request, response: Response, etag: str):
+    headers = {"ETag": etag}
+
+    if not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
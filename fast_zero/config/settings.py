@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 INSTALLED_APPS = [
@@ -14,6 +16,68 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_STICKY_SECONDS: float = 5.0
+    DATABASE_REPLICA_STICKY_MAX_SIZE: int = 10_000
+
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5_000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64_000
+
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_LIFETIME: int
+
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_SIZE: int = 32
+
+    TOKEN_CACHE_TTL: int = 60
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+
+    RESPONSE_CACHE_BACKEND: Literal["memory", "shared"] = "memory"
+    RESPONSE_CACHE_TTL: float = 30.0
+    RESPONSE_CACHE_MAX_SIZE: int = 1_024
+    RESPONSE_CACHE_DIR: str = "/dev/shm/fast_zero"
+
+    TODO_BATCH_MAX_SIZE: int = 500
+    TODO_EXPORT_CHUNK_SIZE: int = 1_000
+    TODO_IMPORT_BATCH_SIZE: int = 1_000
+    TODO_IMPORT_MAX_ERRORS: int = 1_000
+
+    TODO_SHARD_URLS: list[str] = []
+    TODO_SHARD_MAP: Literal["hash", "range"] = "hash"
+    TODO_SHARD_RANGES: list[int] = []
+    TODO_SHARD_DIRECTORY_TTL: float = 1.0
+    TODO_SHARD_DIRECTORY_MAX_SIZE: int = 10_000
+    TODO_ID_BLOCK_SIZE: int = 1_000
+
+    FAST_JSON_RESPONSES: bool = False
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_BYTES: int = 100 * 1024 * 1024
+
+    DEBUG: bool = False
+    QUERY_COUNT_HEADER: str = "X-Query-Count"
+
+    SLOW_QUERY_THRESHOLD_MS: float = 250.0
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_LOG_FILE: str = "logs/slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+    SLOW_QUERY_RATE: float = 1.0
+    SLOW_QUERY_BURST: int = 10
+
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: str = ""
+    METRICS_FLUSH_INTERVAL: float = 5.0
@@ -1,13 +1,266 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import DateTime, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session, registry
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.expression import FunctionElement
 
+from fast_zero.cache import TTLCache
 from fast_zero.config.settings import Settings
+from fast_zero.metrics import Counter, Histogram
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+POOL_WAIT = Histogram(
+    "fast_zero_db_pool_wait_seconds",
+    "Time spent checking a connection out of the pool",
+    labelnames=("database",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_TIMEOUTS = Counter(
+    "fast_zero_db_pool_timeouts_total",
+    "Checkouts that gave up after DATABASE_POOL_TIMEOUT",
+    labelnames=("database",),
+)
+QUERY_DURATION = Histogram(
+    "fast_zero_db_query_duration_seconds",
+    "Time spent executing SQL statements",
+    labelnames=("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+
+SQL_OPERATIONS = {"select", "insert", "update", "delete", "with"}
+READ_METHODS = {"GET", "HEAD"}
+ROUTING_INFO = ("read_only", "user_id", "shards")
+
+settings = Settings()
 
 model_registry = registry()
 
-engine = create_engine(Settings().DATABASE_URL)
 
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # log under sqlalchemy.pool, which SQLAlchemy keeps at WARN, not this module's logger
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+    database = "primary"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(database=self.database).inc()
+            raise
+        finally:
+            POOL_WAIT.labels(database=self.database).observe(time.perf_counter() - start)
+
+
+class utcnow(FunctionElement):
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has second precision on SQLite
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+class QueryStats:
+    __slots__ = ("count", "scope", "seconds")
+
+    def __init__(self, scope=None):
+        self.count = 0
+        self.seconds = 0.0
+        self.scope = scope
+
+
+request_queries: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+request_sessions: ContextVar[list[AsyncSession] | None] = ContextVar("request_sessions", default=None)
+
+
+@contextmanager
+def track_queries(scope=None):
+    stats = request_queries.get()
+    if stats is not None:
+        yield stats
+        return
+
+    stats = QueryStats(scope)
+    token = request_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        request_queries.reset(token)
+
+
+def session_queries(session: Session | AsyncSession):
+    return session.info.setdefault("query_stats", QueryStats())
+
+
+@event.listens_for(Session, "after_begin")
+def bind_session_queries(session, transaction, connection):
+    connection.execution_options(session_queries=session_queries(session))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+    elapsed = time.perf_counter() - context._query_started
+
+    operation = statement.split(maxsplit=1)[0].lower()
+    QUERY_DURATION.labels(operation=operation if operation in SQL_OPERATIONS else "other").observe(elapsed)
+
+    for stats in (request_queries.get(), context.execution_options.get("session_queries")):
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
 
-def get_session():
-    with Session(engine) as session:
+
+def async_database_url(database_url: str):
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT:d}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE:d}")
+    cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE:d}")
+    cursor.close()
+
+
+def build_engine(database_url: str, name: str = "primary", **options):
+    url = async_database_url(database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+
+    if not (is_sqlite and url.database in {None, "", ":memory:"}):
+        options = {
+            "poolclass": type(f"InstrumentedQueuePool[{name}]", (InstrumentedQueuePool,), {"database": name}),
+            "pool_logging_name": name,
+            "pool_size": settings.DATABASE_POOL_SIZE,
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+            "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+            "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+            **options,
+        }
+
+    new_engine = create_async_engine(url, **options)
+
+    if is_sqlite:
+        event.listen(new_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+    return new_engine
+
+
+def pool_stats(target=None):
+    pool = (target or engine).pool
+    database = getattr(pool, "database", "primary")
+    wait = POOL_WAIT.labels(database=database)
+    stats = {
+        "database": database,
+        "checkouts": wait.count,
+        "wait_seconds_total": wait.sum,
+        "timeouts": POOL_TIMEOUTS.labels(database=database).value,
+    }
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+
+    return stats
+
+
+engine = build_engine(settings.DATABASE_URL)
+replica_engines = [
+    build_engine(url, name=f"replica{index}") for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+_replica_turns = itertools.count()
+
+# users who wrote recently read from the primary until their writes reach the replicas
+sticky_users = TTLCache("sticky_users", settings.DATABASE_REPLICA_STICKY_MAX_SIZE)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if mapper is not None and "shards" in self.info:
+            shard = self.info["shards"].get(inspect(mapper).persist_selectable.name)
+            if shard is not None:
+                return shard.sync_engine
+
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+        elif self.reads_from_replica():
+            replica = self.info.get("replica")
+            if replica is None:
+                replica = self.info["replica"] = replica_engines[next(_replica_turns) % len(replica_engines)]
+            return replica.sync_engine
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def reads_from_replica(self):
+        info = self.info
+        if not replica_engines or not info.get("read_only") or info.get("wrote"):
+            return False
+        return info.get("user_id") is None or sticky_users.get(info["user_id"]) is None
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def stick_to_primary(session):
+    if session.info.get("wrote") and session.info.get("user_id") is not None:
+        sticky_users.set(session.info["user_id"], True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def routed_session(bind=None, **info):
+    return AsyncSession(bind or engine, expire_on_commit=False, sync_session_class=RoutingSession, info=info)
+
+
+async def get_session(request: Request):
+    # the connection is only checked out on the first statement
+    async with routed_session(read_only=request.method in READ_METHODS) as session:
+        sessions = request_sessions.get()
+        if sessions is not None:
+            sessions.append(session)
         yield session
+
+
+async def release_sessions():
+    # detaches loaded objects without expiring them, so they can still be serialized
+    for session in request_sessions.get() or ():
+        await session.close()
+
+
+def fork_session(session: AsyncSession):
+    return routed_session(session.bind, **{key: session.info[key] for key in ROUTING_INFO if key in session.info})
@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+
+from fast_zero.config.settings import Settings
+from fast_zero.metrics import Counter, Gauge, Histogram
+
+settings = Settings()
+
+pwd_context = PasswordHash.recommended()
+
+HASH_QUEUE_DEPTH = Gauge("fast_zero_hash_queue_depth", "Password hashing jobs waiting for a free worker")
+HASH_IN_FLIGHT = Gauge("fast_zero_hash_in_flight", "Password hashing jobs submitted to the pool")
+HASH_REJECTED = Counter("fast_zero_hash_rejected_total", "Password hashing jobs rejected because the queue was full")
+HASH_DURATION = Histogram(
+    "fast_zero_hash_duration_seconds",
+    "Time to hash or verify a password, including queueing",
+    labelnames=("operation",),
+)
+
+
+def hash_password(password: str):
+    return pwd_context.hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingExecutor:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self._pool = None
+        self._owns_pool = True
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # forking a multi-threaded event loop process can deadlock the children
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return self._pool
+
+    async def run(self, operation: str, func, *args):
+        if self.pending >= self.workers + self.queue_size:
+            HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password requests, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        pool = self.pool
+        self._track(1)
+        try:
+            with HASH_DURATION.labels(operation=operation).time():
+                return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # a dead worker breaks the whole pool; start a fresh one for the next job
+            if self._pool is pool:
+                self.shutdown()
+            raise
+        finally:
+            self._track(-1)
+
+    def use(self, pool: Executor):
+        # e.g. an in-process executor in tests; the caller keeps ownership and shuts it down
+        self.shutdown()
+        self._pool = pool
+        self._owns_pool = False
+
+    def shutdown(self):
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _track(self, delta: int):
+        self.pending += delta
+        HASH_IN_FLIGHT.set(self.pending)
+        HASH_QUEUE_DEPTH.set(max(self.pending - self.workers, 0))
+
+
+hash_executor = HashingExecutor(workers=settings.HASH_WORKERS, queue_size=settings.HASH_QUEUE_SIZE)
@@ -0,0 +1,254 @@
+import bisect
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children = {}
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        return list(self._children.items())
+
+    @staticmethod
+    def _new_child():
+        return _Value()
+
+    def _default(self):
+        return self.labels()
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+COLLECTORS = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collector(func):
+    COLLECTORS.append(func)
+    return func
+
+
+def snapshot():
+    for func in COLLECTORS:
+        func()
+
+    families = {}
+    for metric in REGISTRY:
+        if metric.kind == "histogram":
+            samples = [
+                [list(key), {"counts": list(child.counts), "count": child.count, "sum": child.sum}]
+                for key, child in metric.samples()
+            ]
+        else:
+            samples = [[list(key), child.value] for key, child in metric.samples()]
+
+        families[metric.name] = {
+            "kind": metric.kind,
+            "documentation": metric.documentation,
+            "labelnames": list(metric.labelnames),
+            "buckets": list(getattr(metric, "buckets", ())),
+            "samples": samples,
+        }
+
+    return families
+
+
+def merge(snapshots):
+    merged = {}
+    for families in snapshots:
+        for name, family in families.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif family["kind"] == "histogram":
+                    target["samples"][key] = {
+                        "counts": [a + b for a, b in zip(current["counts"], value["counts"], strict=True)],
+                        "count": current["count"] + value["count"],
+                        "sum": current["sum"] + value["sum"],
+                    }
+                else:
+                    target["samples"][key] = current + value
+
+    for family in merged.values():
+        family["samples"] = [[list(key), value] for key, value in family["samples"].items()]
+
+    return merged
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render(families=None):
+    if families is None:
+        families = snapshot()
+
+    lines = []
+    for name, family in sorted(families.items()):
+        lines.append(f"# HELP {name} {_escape(family['documentation'])}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+
+        for key, value in sorted(family["samples"]):
+            pairs = list(zip(family["labelnames"], key, strict=True))
+
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+                continue
+
+            cumulative = 0
+            bounds = [*family["buckets"], float("inf")]
+            for bound, count in zip(bounds, value["counts"], strict=True):
+                cumulative += count
+                labels = _format_labels([*pairs, ("le", _format_value(bound))])
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(pairs)} {value['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(directory):
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+
+    target = path / f"{os.getpid()}.json"
+    temporary = target.with_suffix(".tmp")
+    temporary.write_text(json.dumps(snapshot()))
+    os.replace(temporary, target)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshots(directory):
+    snapshots = []
+    for path in sorted(Path(directory).glob("*.json")):
+        try:
+            families = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+
+        if not _alive(int(path.stem)):
+            families = {name: family for name, family in families.items() if family["kind"] != "gauge"}
+
+        snapshots.append(families)
+
+    return snapshots
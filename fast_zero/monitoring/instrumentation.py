@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+from anyio import to_thread
+
+from fast_zero import database
+from fast_zero.database import pool_stats, track_queries
+from fast_zero.metrics import Counter, Gauge, Histogram, collector, write_snapshot
+
+REQUEST_DURATION = Histogram(
+    "fast_zero_http_request_duration_seconds",
+    "Time spent handling HTTP requests",
+    labelnames=("method", "route"),
+)
+REQUESTS = Counter(
+    "fast_zero_http_requests_total",
+    "HTTP requests by route and status code",
+    labelnames=("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge("fast_zero_http_requests_in_flight", "HTTP requests currently being handled")
+REQUEST_QUERIES = Histogram(
+    "fast_zero_http_request_queries",
+    "SQL statements executed per HTTP request",
+    labelnames=("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    "fast_zero_http_request_query_seconds",
+    "Time spent in SQL statements per HTTP request",
+    labelnames=("route",),
+)
+POOL_CHECKED_OUT = Gauge(
+    "fast_zero_db_pool_checked_out", "Connections currently checked out", labelnames=("database",)
+)
+POOL_OVERFLOW = Gauge("fast_zero_db_pool_overflow", "Overflow connections currently open", labelnames=("database",))
+THREADPOOL_BUSY = Gauge("fast_zero_threadpool_busy_threads", "Worker threads in use by the default threadpool")
+THREADPOOL_CAPACITY = Gauge("fast_zero_threadpool_capacity", "Size of the default threadpool")
+
+
+_routes = {}
+
+
+def route_name(scope):
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+
+    name = _routes.get(endpoint)
+    if name is None:
+        name = next(
+            (route.path for route in scope["router"].routes if getattr(route, "endpoint", None) is endpoint),
+            "unmatched",
+        )
+        _routes[endpoint] = name
+    return name
+
+
+@collector
+def collect_pool():
+    for target in (database.engine, *database.replica_engines):
+        stats = pool_stats(target)
+        POOL_CHECKED_OUT.labels(database=stats["database"]).set(stats.get("checked_out", 0))
+        POOL_OVERFLOW.labels(database=stats["database"]).set(stats.get("overflow", 0))
+
+
+@collector
+def collect_threadpool():
+    try:
+        limiter = to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        # only reachable from inside the event loop
+        return
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_CAPACITY.set(limiter.total_tokens)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            with track_queries(scope) as stats:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+
+            route = route_name(scope)
+            REQUEST_DURATION.labels(method=scope["method"], route=route).observe(elapsed)
+            REQUESTS.labels(method=scope["method"], route=route, status=status_code).inc()
+            REQUEST_QUERIES.labels(route=route).observe(stats.count)
+            REQUEST_QUERY_SECONDS.labels(route=route).observe(stats.seconds)
+
+
+class QueryCountMiddleware:
+    def __init__(self, app, *, header: str):
+        self.app = app
+        self.header = header.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with track_queries(scope) as stats:
+
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), (self.header, str(stats.count).encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
+
+
+async def flush_metrics(directory, interval):
+    while True:
+        write_snapshot(directory)
+        await asyncio.sleep(interval)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Response
+
+from fast_zero.config.settings import Settings
+from fast_zero.database import pool_stats
+from fast_zero.metrics import CONTENT_TYPE, merge, read_snapshots, render, write_snapshot
+
+settings = Settings()
+
+monitoring_router = APIRouter(tags=["monitoring"])
+
+
+@monitoring_router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    if settings.METRICS_MULTIPROC_DIR:
+        write_snapshot(settings.METRICS_MULTIPROC_DIR)
+        body = render(merge(read_snapshots(settings.METRICS_MULTIPROC_DIR)))
+    else:
+        body = render()
+    return Response(body, media_type=CONTENT_TYPE)
+
+
+@monitoring_router.get("/metrics/pool")
+async def read_pool_stats():
+    return pool_stats()
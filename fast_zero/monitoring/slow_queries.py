@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import UTC, datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from fast_zero.config.settings import Settings
+from fast_zero.database import request_queries
+from fast_zero.metrics import Counter
+from fast_zero.monitoring.instrumentation import route_name
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN (FORMAT JSON) ",
+}
+EXPLAINABLE = ("select", "update", "delete", "with")
+
+SLOW_QUERIES = Counter("fast_zero_slow_queries_total", "Statements slower than SLOW_QUERY_THRESHOLD_MS")
+SLOW_QUERIES_DROPPED = Counter(
+    "fast_zero_slow_queries_dropped_total", "Slow statements not logged because of the rate limit"
+)
+
+settings = Settings()
+
+
+def redact(parameters):
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class SlowQueryLog:
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        threshold_ms: float,
+        path: str,
+        max_bytes: int,
+        backup_count: int,
+        rate: float,
+        burst: int,
+        explain: bool,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.limiter = TokenBucket(rate, burst)
+        self.explain = explain
+        self.pending = set()
+        self._logger = None
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+
+            self._logger = logging.getLogger(f"{__name__}.{self.path}")
+            self._logger.addHandler(handler)
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+        return self._logger
+
+    def record(self, conn, statement, parameters, executemany, elapsed):  # noqa: PLR0913, PLR0917
+        if self.threshold <= 0 or elapsed < self.threshold:
+            return
+
+        SLOW_QUERIES.inc()
+        if not self.limiter.acquire():
+            SLOW_QUERIES_DROPPED.inc()
+            return
+
+        stats = request_queries.get()
+        scope = stats.scope if stats is not None else None
+        entry = {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "parameters": {"rows": len(parameters)} if executemany else redact(parameters),
+            "method": scope["method"] if scope else None,
+            "route": route_name(scope) if scope else None,
+        }
+
+        prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if self.explain and prefix and not executemany and statement.lstrip()[:6].lower().startswith(EXPLAINABLE):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+            if loop is not None:
+                task = loop.create_task(self.write_with_plan(conn.engine, prefix + statement, parameters, entry))
+                self.pending.add(task)
+                task.add_done_callback(self.pending.discard)
+                return
+
+        self.write(entry)
+
+    async def write_with_plan(self, sync_engine, explain, parameters, entry):
+        try:
+            async with AsyncEngine(sync_engine).connect() as conn:
+                result = await conn.exec_driver_sql(explain, parameters, execution_options={"slow_query_log": False})
+                entry["plan"] = [list(row) for row in result]
+        except Exception as error:  # noqa: BLE001
+            entry["plan_error"] = str(error)
+        self.write(entry)
+
+    def write(self, entry):
+        self.logger.info(json.dumps(entry, default=str))
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    path=settings.SLOW_QUERY_LOG_FILE,
+    max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+    backup_count=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+    rate=settings.SLOW_QUERY_RATE,
+    burst=settings.SLOW_QUERY_BURST,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def log_slow_query(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+    if not context.execution_options.get("slow_query_log", True):
+        return
+    elapsed = time.perf_counter() - context._query_started
+    slow_query_log.record(conn, statement, parameters, executemany, elapsed)
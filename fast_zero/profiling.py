@@ -0,0 +1,69 @@
+import asyncio
+import cProfile
+import hmac
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+
+class ProfilingMiddleware:
+    def __init__(  # noqa: PLR0913
+        self, app, *, directory: str, header: str, token: str, sample_rate: float, max_bytes: int
+    ):
+        self.app = app
+        self.directory = Path(directory)
+        self.header = header.lower().encode()
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def should_profile(self, scope):
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == self.header and hmac.compare_digest(value, self.token):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        # cProfile can only trace one request per interpreter at a time
+        if not self._lock.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 10**9:09d}-{scope['method']}-{slug}.prof"
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode())]
+            await send(message)
+
+        # cProfile traces the whole thread, not this task: whatever other requests run on the
+        # event loop while this one awaits is recorded too. Profiles are only clean on an idle
+        # worker, so send the profiling header to a server that is not under load.
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profiler.disable()
+            await asyncio.to_thread(self.dump, profiler, name)
+        finally:
+            self._lock.release()
+
+    def dump(self, profiler: cProfile.Profile, name: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / name)
+
+        profiles = sorted(self.directory.glob("*.prof"), key=lambda path: path.stat().st_mtime)
+        total = sum(path.stat().st_size for path in profiles)
+        while profiles and total > self.max_bytes:
+            oldest = profiles.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
@@ -0,0 +1,38 @@
+import functools
+import inspect
+
+from fastapi.routing import APIRoute
+
+from fast_zero.database import release_sessions, request_sessions
+
+
+def release_after(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            await release_sessions()
+
+    return wrapper
+
+
+class SessionRoute(APIRoute):
+    # hands request sessions back to the pool when the endpoint returns instead of
+    # after the response has been validated and serialized
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        if inspect.iscoroutinefunction(endpoint):
+            self.dependant.call = release_after(endpoint)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request):
+            token = request_sessions.set([])
+            try:
+                return await handler(request)
+            finally:
+                request_sessions.reset(token)
+
+        return route_handler
@@ -1,30 +1,46 @@
+import hashlib
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt import ExpiredSignatureError, PyJWTError, decode, encode
-from pwdlib import PasswordHash
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from zoneinfo import ZoneInfo
 
 from fast_zero.auth.schema import TokenData
+from fast_zero.cache import TTLCache
 from fast_zero.config.settings import Settings
 from fast_zero.database import get_session
+from fast_zero.hashing import check_password, hash_executor, hash_password
 from fast_zero.users.models import User
 
 settings = Settings()
 
-pwd_context = PasswordHash.recommended()
+# stored while a new account's password is still being hashed; matches no password
+UNUSABLE_PASSWORD = "!"
+
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="auth/token")
+token_cache = TTLCache("token", maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
 
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    id: int
+    username: str
+    email: str
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
 
+async def get_password_hash(password: str):
+    return await hash_executor.run("hash", hash_password, password)
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+
+async def verify_password(plain_password: str, hashed_password: str):
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
+    return await hash_executor.run("verify", check_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict):
@@ -41,13 +57,20 @@ def create_access_token(data: dict):
     return enconded_jwt
 
 
-def get_current_user(session: Session = Depends(get_session), token: str = Depends(oauth2_schema)):
+async def get_current_user(session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_schema)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cache_key = hashlib.sha256(token.encode()).digest()
+    current_user = token_cache.get(cache_key)
+
+    if current_user:
+        session.info["user_id"] = current_user.id
+        return current_user
+
     try:
         payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username = payload.get("sub")
@@ -65,9 +88,18 @@ def get_current_user(session: Session = Depends(get_session), token: str = Depen
     except PyJWTError:
         raise credentials_exception
 
-    user_db = session.scalar(select(User).where(User.email == token_data.username))
+    user_db = await session.scalar(select(User).where(func.lower(User.email) == token_data.username.lower()))
 
     if not user_db:
         raise credentials_exception
 
-    return user_db
+    current_user = CurrentUser(id=user_db.id, username=user_db.username, email=user_db.email)
+    session.info["user_id"] = current_user.id
+    token_cache.set(
+        cache_key,
+        current_user,
+        ttl=min(settings.TOKEN_CACHE_TTL, payload["exp"] - time.time()),
+        tag=current_user.id,
+    )
+
+    return current_user
@@ -1,10 +1,10 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, ForeignKey, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column
 
-from fast_zero.database import model_registry
+from fast_zero.database import model_registry, utcnow
 
 
 class TodoState(Enum):
@@ -18,6 +18,11 @@ class TodoState(Enum):
 @model_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_user_id_id", "user_id", "id"),
+        Index("ix_todos_user_id_state_id", "user_id", "state", "id"),
+        Index("ix_todos_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -30,7 +35,58 @@ class Todo:
         server_default=func.now(),
     )
     updated_at: Mapped[datetime] = mapped_column(
-        server_default=func.now(),
-        server_onupdate=func.now(),
+        server_default=utcnow(),
+        server_onupdate=utcnow(),
+        onupdate=utcnow(),
         init=False,
     )
+
+
+@model_registry.mapped_as_dataclass
+class TodoShard:
+    # users whose todos were moved off the shard the shard map assigns them
+    __tablename__ = "todo_shards"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    shard: Mapped[int]
+    locked: Mapped[bool] = mapped_column(default=False)
+
+
+@model_registry.mapped_as_dataclass
+class TodoIdBlock:
+    # todo ids are handed out in blocks from the primary so they stay unique across shards
+    __tablename__ = "todo_id_blocks"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    next_id: Mapped[int]
+
+
+SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE todos_fts USING fts5(title, description, content='todos', content_rowid='id')",
+        """CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+            INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END""",
+        """CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END""",
+        """CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END""",
+    ],
+    "postgresql": [
+        """CREATE INDEX ix_todos_search ON todos USING GIN (
+            (setweight(to_tsvector('simple'::regconfig, title), 'A')
+             || setweight(to_tsvector('simple'::regconfig, description), 'B'))
+        )""",
+    ],
+}
+
+for dialect, statements in SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Todo.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
+
+event.listen(Todo.__table__, "before_drop", DDL("DROP TABLE IF EXISTS todos_fts").execute_if(dialect="sqlite"))
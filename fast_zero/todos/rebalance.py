@@ -0,0 +1,146 @@
+"""Manage the todo shards.
+
+Usage:
+    python -m fast_zero.todos.rebalance init
+    python -m fast_zero.todos.rebalance locate USER_ID
+    python -m fast_zero.todos.rebalance move USER_ID SHARD
+
+``init`` creates the todos schema on every shard in TODO_SHARD_URLS and makes
+sure new todo ids start above every existing one.
+
+``move`` relocates one user's todos while the API keeps serving:
+
+1. the user is locked in the shard directory; reads continue from the old
+   shard, writes get 503 + Retry-After;
+2. after the directory cache TTL plus ``--drain`` seconds, so that writes that
+   passed the check before the lock have finished, the rows are copied with
+   their ids;
+3. the directory points at the new shard and is unlocked;
+4. after another directory cache TTL the rows are deleted from the old shard.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero import database
+from fast_zero.config.settings import Settings
+from fast_zero.todos import shards
+from fast_zero.todos.models import Todo, TodoIdBlock, TodoShard
+
+settings = Settings()
+
+
+async def init_shards():
+    for engine in shards.shard_engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(shards.create_shard_schema)
+
+    last_id = 0
+    for engine in (database.engine, *shards.shard_engines):
+        async with engine.connect() as conn:
+            last_id = max(last_id, await conn.scalar(select(func.coalesce(func.max(Todo.id), 0))))
+
+    async with AsyncSession(database.engine) as session:
+        block = await session.get(TodoIdBlock, Todo.__tablename__)
+        if block is None:
+            session.add(TodoIdBlock(name=Todo.__tablename__, next_id=last_id + 1))
+        else:
+            block.next_id = max(block.next_id, last_id + 1)
+        await session.commit()
+
+
+async def place(user_id: int, shard: int, *, locked: bool):
+    async with AsyncSession(database.engine) as session:
+        if shard == shards.shard_map.shard_for(user_id) and not locked:
+            await session.execute(delete(TodoShard).where(TodoShard.user_id == user_id))
+        else:
+            await session.merge(TodoShard(user_id=user_id, shard=shard, locked=locked))
+        await session.commit()
+
+
+async def copy_todos(source, target, user_id: int, batch_size: int):
+    columns = list(Todo.__table__.c)
+    copied = 0
+
+    async with source.connect() as reader, target.begin() as writer:
+        # leftovers of an interrupted move
+        await writer.execute(delete(Todo).where(Todo.user_id == user_id))
+
+        last_id = 0
+        while True:
+            rows = (
+                await reader.execute(
+                    select(*columns)
+                    .where(Todo.user_id == user_id, Todo.id > last_id)
+                    .order_by(Todo.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return copied
+
+            await writer.execute(insert(Todo.__table__), [row._asdict() for row in rows])
+            copied += len(rows)
+            last_id = rows[-1].id
+
+
+async def move_user(
+    user_id: int, target: int, *, batch_size: int = 1_000, drain: float = 30.0, settle: float | None = None
+):
+    settle = settings.TODO_SHARD_DIRECTORY_TTL if settle is None else settle
+
+    async with database.engine.connect() as conn:
+        source = (await shards.read_placement(conn, user_id)).shard
+    if source == target:
+        return 0
+
+    await place(user_id, source, locked=True)
+    await asyncio.sleep(settle + drain)
+
+    moved = await copy_todos(shards.shard_engines[source], shards.shard_engines[target], user_id, batch_size)
+
+    await place(user_id, target, locked=False)
+    await asyncio.sleep(settle)
+
+    async with shards.shard_engines[source].begin() as conn:
+        await conn.execute(delete(Todo).where(Todo.user_id == user_id))
+
+    return moved
+
+
+async def main(args):
+    if not shards.shard_engines:
+        raise SystemExit("TODO_SHARD_URLS is empty")
+
+    try:
+        if args.command == "init":
+            await init_shards()
+        elif args.command == "locate":
+            async with database.engine.connect() as conn:
+                placement = await shards.read_placement(conn, args.user_id)
+            print(f"user {args.user_id}: shard {placement.shard}{' (locked)' if placement.locked else ''}")
+        else:
+            if not 0 <= args.shard < len(shards.shard_engines):
+                raise SystemExit(f"shard must be between 0 and {len(shards.shard_engines) - 1}")
+            moved = await move_user(args.user_id, args.shard, batch_size=args.batch_size, drain=args.drain)
+            print(f"moved {moved} todos of user {args.user_id} to shard {args.shard}")
+    finally:
+        for engine in (database.engine, *shards.shard_engines):
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init")
+    locate = commands.add_parser("locate")
+    locate.add_argument("user_id", type=int)
+    move = commands.add_parser("move")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard", type=int)
+    move.add_argument("--batch-size", type=int, default=1_000)
+    move.add_argument("--drain", type=float, default=30.0, help="seconds to wait for in-flight writes")
+    asyncio.run(main(parser.parse_args()))
@@ -1,82 +1,484 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+import base64
+import codecs
+import collections
+import csv
+import io
+import json
+import logging
+import time
 
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+
+from fast_zero.conditional import conditional_response, weak_etag
+from fast_zero.config.settings import Settings
+from fast_zero.database import fork_session, utcnow
+from fast_zero.routing import SessionRoute
 from fast_zero.todos.models import Todo
-from fast_zero.todos.schema import TodoFilter, TodoList, TodoResponse, TodoSchema, TodoUpdate
-from fast_zero.types import T_CurrentUser, T_Session
+from fast_zero.todos.schema import (
+    ExportFormat,
+    TodoBatchCreate,
+    TodoBatchDelete,
+    TodoBatchResult,
+    TodoBatchUpdate,
+    TodoBatchUpdateItem,
+    TodoFilter,
+    TodoImportResult,
+    TodoList,
+    TodoResponse,
+    TodoSchema,
+    TodoUpdate,
+)
+from fast_zero.todos.search import search_todos
+from fast_zero.todos.shards import assign_todo_ids
+from fast_zero.types import T_CurrentUser, T_TodoSession
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+todo_router = APIRouter(prefix="/todos", tags=["todos"], route_class=SessionRoute)
+
+TODO_RESPONSE_COLUMNS = tuple(getattr(Todo, field) for field in TodoResponse.model_fields)
 
-todo_router = APIRouter(prefix="/todos", tags=["todos"])
+MAX_TODO_ID = 2**63 - 1
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
 
 
 @todo_router.post("/", response_model=TodoResponse)
-def create_todo(todo: TodoSchema, session: T_Session, user: T_CurrentUser):
+async def create_todo(todo: TodoSchema, session: T_TodoSession, user: T_CurrentUser):
     db_todo = Todo(
         **todo.model_dump(exclude=("user_id",)),
         user_id=user.id,
     )
+    await assign_todo_ids([db_todo])
 
     session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
+    await session.refresh(db_todo)
     return db_todo
 
 
-@todo_router.get("/", response_model=TodoList)
-def list_todo(session: T_Session, user=T_CurrentUser, todo_filter: TodoFilter = Depends()):
-    query = select(Todo).where(Todo.user_id == user.id)
+def check_batch_size(items: list):
+    if len(items) > settings.TODO_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch size is limited to {settings.TODO_BATCH_MAX_SIZE} items",
+        )
+
+
+def not_found(todo_id: int):
+    return {"id": todo_id, "status": status.HTTP_404_NOT_FOUND, "detail": "Task not found"}
+
+
+def null_fields(item: TodoBatchUpdateItem):
+    return sorted(field for field in item.model_fields_set - {"id"} if getattr(item, field) is None)
+
+
+@todo_router.post("/batch", response_model=TodoBatchResult)
+async def create_todo_batch(batch: TodoBatchCreate, session: T_TodoSession, user: T_CurrentUser):
+    check_batch_size(batch.todos)
+
+    if not batch.todos:
+        return {"results": []}
+
+    rows = [{**todo.model_dump(), "user_id": user.id} for todo in batch.todos]
+    await assign_todo_ids(rows)
+
+    todos = await session.scalars(insert(Todo).returning(Todo, sort_by_parameter_order=True), rows)
+    todos = todos.all()
+    await session.commit()
+
+    return {"results": [{"id": todo.id, "status": status.HTTP_201_CREATED, "todo": todo} for todo in todos]}
+
+
+@todo_router.patch("/batch", response_model=TodoBatchResult)
+async def patch_todo_batch(batch: TodoBatchUpdate, session: T_TodoSession, user: T_CurrentUser):
+    check_batch_size(batch.todos)
+
+    ids = {item.id for item in batch.todos}
+    owned = set(await session.scalars(select(Todo.id).where(Todo.user_id == user.id, Todo.id.in_(ids))))
+
+    # the columns are NOT NULL: an explicit null fails its item instead of the whole statement
+    nulls = {index: null_fields(item) for index, item in enumerate(batch.todos)}
+    changes = [
+        {"id": item.id, **item.model_dump(exclude_unset=True, exclude={"id"})}
+        for index, item in enumerate(batch.todos)
+        if item.id in owned and item.model_fields_set - {"id"} and not nulls[index]
+    ]
+    if changes:
+        await session.execute(
+            update(Todo).where(Todo.user_id == user.id).execution_options(synchronize_session=None),
+            changes,
+        )
+
+    todos = {}
+    if owned:
+        result = await session.scalars(
+            select(Todo).where(Todo.id.in_(owned)).execution_options(populate_existing=True),
+        )
+        todos = {todo.id: todo for todo in result}
+    await session.commit()
+
+    results = []
+    for index, item in enumerate(batch.todos):
+        if item.id not in todos:
+            results.append(not_found(item.id))
+        elif nulls[index]:
+            results.append({
+                "id": item.id,
+                "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "detail": f"{', '.join(nulls[index])} may not be null",
+            })
+        else:
+            results.append({"id": item.id, "status": status.HTTP_200_OK, "todo": todos[item.id]})
+
+    return {"results": results}
+
+
+@todo_router.delete("/batch", response_model=TodoBatchResult)
+async def delete_todo_batch(batch: TodoBatchDelete, session: T_TodoSession, user: T_CurrentUser):
+    check_batch_size(batch.ids)
+
+    deleted = set()
+    if batch.ids:
+        deleted = set(
+            await session.scalars(
+                delete(Todo).where(Todo.user_id == user.id, Todo.id.in_(batch.ids)).returning(Todo.id),
+            )
+        )
+        await session.commit()
+
+    return {
+        "results": [
+            {"id": todo_id, "status": status.HTTP_204_NO_CONTENT} if todo_id in deleted else not_found(todo_id)
+            for todo_id in batch.ids
+        ]
+    }
+
+
+async def iter_lines(chunks):
+    # utf-8-sig drops a leading BOM; surrogateescape keeps invalid bytes, so they reject their row only
+    decoder = codecs.getincrementaldecoder("utf-8-sig")("surrogateescape")
+    pending = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_ndjson(lines):
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        yield line_number, line.strip()
+
+
+class PendingLines:
+    # csv.reader pulls lines synchronously; it is only advanced once a whole record is buffered
+    def __init__(self):
+        self.lines = collections.deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv(lines):
+    pending = PendingLines()
+    reader = csv.reader(pending)
+    quotes = 0
+
+    async for line in lines:
+        pending.lines.append(line)
+        # an odd number of quotes so far: a quoted field continues on the next line
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            quotes = 0
+            while pending.lines:
+                yield reader.line_num + 1, read_csv_row(reader)
+
+    while pending.lines:
+        yield reader.line_num + 1, read_csv_row(reader)
+
+
+def read_csv_row(reader):
+    try:
+        return next(reader)
+    except csv.Error as error:
+        return error
+
+
+def check_utf8(text: str):
+    # raises UnicodeEncodeError for bytes that iter_lines could not decode
+    text.encode()
+    return text
+
+
+def parse_ndjson(line: str, header: list[str] | None):
+    return json.loads(check_utf8(line))
+
 
-    if todo_filter.title:
-        query = query.filter(Todo.title.contains(todo_filter.title))
+def parse_csv(row: list[str] | csv.Error, header: list[str]):
+    if isinstance(row, csv.Error):
+        raise row
+    return dict(zip(header, map(check_utf8, row), strict=True))
 
-    if todo_filter.description:
-        query = query.filter(Todo.description.contains(todo_filter.description))
+
+def describe_error(error: Exception):
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, item['loc'])) or 'line'}: {item['msg']}" for item in error.errors())
+    if isinstance(error, json.JSONDecodeError):
+        return "Invalid JSON"
+    if isinstance(error, UnicodeError):
+        return "Invalid UTF-8"
+    return "Invalid CSV row"
+
+
+@todo_router.post(
+    "/import",
+    response_model=TodoImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_todos(request: Request, session: T_TodoSession, user: T_CurrentUser):
+    is_csv = request.headers.get("content-type", "").startswith("text/csv")
+    parse = parse_csv if is_csv else parse_ndjson
+    header = None
+
+    accepted = 0
+    rejected = 0
+    errors = []
+    rows = []
+    start = time.perf_counter()
+
+    async def flush():
+        nonlocal accepted
+        if rows:
+            await assign_todo_ids(rows)
+            await session.execute(insert(Todo), rows)
+            await session.commit()
+            accepted += len(rows)
+            rows.clear()
+
+    records = (iter_csv if is_csv else iter_ndjson)(iter_lines(request.stream()))
+    async for line_number, record in records:
+        if not record:
+            continue
+
+        if is_csv and header is None:
+            header = record
+            continue
+
+        try:
+            todo = TodoSchema.model_validate(parse(record, header))
+        except (ValueError, TypeError, csv.Error) as error:
+            rejected += 1
+            if len(errors) < settings.TODO_IMPORT_MAX_ERRORS:
+                errors.append({"line": line_number, "detail": describe_error(error)})
+            continue
+
+        rows.append({**todo.model_dump(), "user_id": user.id})
+        if len(rows) >= settings.TODO_IMPORT_BATCH_SIZE:
+            await flush()
+
+    await flush()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Imported %d todos for user %d (%d rejected) in %.2fs, %.0f rows/s",
+        accepted,
+        user.id,
+        rejected,
+        elapsed,
+        (accepted + rejected) / elapsed if elapsed else 0,
+    )
+
+    return {"accepted": accepted, "rejected": rejected, "errors": errors}
+
+
+def encode_cursor(todo_id: int):
+    return base64.urlsafe_b64encode(str(todo_id).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        todo_id = int(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        todo_id = 0
+
+    # ids are positive and must fit the driver's 64-bit integers
+    if not 0 < todo_id <= MAX_TODO_ID:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    return todo_id
+
+
+def filter_todos(query, todo_filter: TodoFilter, dialect: str):
+    query = search_todos(query, dialect, todo_filter)
 
     if todo_filter.state:
         query = query.filter(Todo.state == todo_filter.state)
 
-    todos = session.scalars(query.offset(todo_filter.offset).limit(todo_filter.limit)).all()
+    return query
+
+
+def todos_query(user_id: int, todo_filter: TodoFilter, dialect: str, columns=(Todo,)):
+    if todo_filter.q and todo_filter.after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is not supported with q",
+        )
+
+    query = filter_todos(select(*columns).where(Todo.user_id == user_id), todo_filter, dialect).order_by(Todo.id)
+
+    if todo_filter.after:
+        query = query.where(Todo.id > decode_cursor(todo_filter.after))
+    else:
+        query = query.offset(todo_filter.offset)
+
+    return query.limit(todo_filter.limit)
+
+
+def dump_todo_list(todos: list[dict], next_cursor: str | None):
+    # skips response_model validation and jsonable_encoder: orjson encodes datetimes and TodoState natively
+    return orjson.dumps({"todos": todos, "next_cursor": next_cursor})
+
+
+@todo_router.get("/", response_model=TodoList)
+async def list_todo(
+    request: Request,
+    response: Response,
+    session: T_TodoSession,
+    user: T_CurrentUser,
+    todo_filter: TodoFilter = Depends(),
+):
+    dialect = session.get_bind(Todo).dialect.name
+    query = todos_query(user.id, todo_filter, dialect, TODO_RESPONSE_COLUMNS)
+
+    # plain rows: no entity hydration or identity map for a read-only page
+    todos = [row._asdict() for row in await session.execute(query)]
+
+    # q results are ordered by rank, not id: they page with offset only
+    next_cursor = None
+    if todo_filter.limit and len(todos) == todo_filter.limit and not todo_filter.q:
+        next_cursor = encode_cursor(todos[-1]["id"])
+
+    # the page itself is the version: an aggregate over every matching row costs more than the page query
+    not_modified = conditional_response(request, response, weak_etag(user.id, todos, next_cursor))
+    if not_modified is not None:
+        return not_modified
 
-    return {"todos": todos}
+    if settings.FAST_JSON_RESPONSES:
+        return Response(dump_todo_list(todos, next_cursor), media_type="application/json", headers=response.headers)
+
+    return {"todos": todos, "next_cursor": next_cursor}
+
+
+async def stream_todos(session, query, export_format: ExportFormat):
+    async with fork_session(session) as stream_session:
+        result = await stream_session.stream_scalars(
+            query.execution_options(yield_per=settings.TODO_EXPORT_CHUNK_SIZE),
+        )
+
+        if export_format == ExportFormat.csv:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=list(TodoResponse.model_fields))
+            writer.writeheader()
+            async for todos in result.partitions():
+                for todo in todos:
+                    writer.writerow(TodoResponse.model_validate(todo, from_attributes=True).model_dump(mode="json"))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            async for todos in result.partitions():
+                yield "".join(
+                    TodoResponse.model_validate(todo, from_attributes=True).model_dump_json() + "\n" for todo in todos
+                )
+
+
+@todo_router.get("/export", response_class=StreamingResponse)
+async def export_todos(
+    session: T_TodoSession,
+    user: T_CurrentUser,
+    todo_filter: TodoFilter = Depends(),
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+):
+    query = todos_query(user.id, todo_filter, session.get_bind(Todo).dialect.name)
+
+    return StreamingResponse(
+        stream_todos(session, query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="todos.{export_format.value}"'},
+    )
 
 
 @todo_router.patch("/{todo_id}", response_model=TodoResponse)
-def patch_user(
+async def patch_user(
     todo_id: int,
-    session: T_Session,
+    session: T_TodoSession,
     current_user: T_CurrentUser,
     new_todo: TodoUpdate,
 ):
-    exist_todo = session.scalar(
-        select(Todo).where(Todo.id == todo_id, Todo.user_id == current_user.id),
-    )
+    # ownership check, change and updated_at in one statement
+    todo = (
+        await session.execute(
+            update(Todo)
+            .where(Todo.id == todo_id, Todo.user_id == current_user.id)
+            .values(**new_todo.model_dump(exclude_unset=True), updated_at=utcnow())
+            .returning(*TODO_RESPONSE_COLUMNS),
+        )
+    ).one_or_none()
 
-    if not exist_todo:
+    if todo is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    for key, value in new_todo.model_dump(exclude_unset=True).items():
-        setattr(exist_todo, key, value)
-
-    session.add(exist_todo)
-    session.commit()
-    session.refresh(exist_todo)
+    await session.commit()
 
-    return exist_todo
+    return todo._asdict()
 
 
 @todo_router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(todo_id: int, session: T_Session, current_user: T_CurrentUser):
-    exist_todo = session.scalar(
-        select(Todo).where(Todo.id == todo_id, Todo.user_id == current_user.id),
+async def delete_user(todo_id: int, session: T_TodoSession, current_user: T_CurrentUser):
+    result = await session.execute(
+        delete(Todo).where(Todo.id == todo_id, Todo.user_id == current_user.id),
     )
 
-    if not exist_todo:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    session.delete(exist_todo)
-    session.commit()
+    await session.commit()
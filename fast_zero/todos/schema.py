@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel
@@ -19,18 +20,64 @@ class TodoResponse(TodoSchema):
 
 
 class TodoFilter(BaseModel):
+    q: Optional[str] = None
     title: Optional[str] = None
     description: Optional[str] = None
     state: Optional[TodoState] = None
     offset: Optional[int] = None
     limit: Optional[int] = None
+    after: Optional[str] = None
 
 
 class TodoList(BaseModel):
     todos: list[TodoResponse]
+    next_cursor: Optional[str] = None
 
 
 class TodoUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     state: Optional[TodoState] = None
+
+
+class TodoBatchCreate(BaseModel):
+    todos: list[TodoSchema]
+
+
+class TodoBatchUpdateItem(TodoUpdate):
+    id: int
+
+
+class TodoBatchUpdate(BaseModel):
+    todos: list[TodoBatchUpdateItem]
+
+
+class TodoBatchDelete(BaseModel):
+    ids: list[int]
+
+
+class TodoBatchItem(BaseModel):
+    id: int
+    status: int
+    detail: Optional[str] = None
+    todo: Optional[TodoResponse] = None
+
+
+class TodoBatchResult(BaseModel):
+    results: list[TodoBatchItem]
+
+
+class ExportFormat(Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class TodoImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class TodoImportResult(BaseModel):
+    accepted: int
+    rejected: int
+    errors: list[TodoImportError]
@@ -0,0 +1,76 @@
+import re
+
+from sqlalchemy import Column, Integer, MetaData, Table, false, func, literal_column, or_
+
+from fast_zero.todos.models import Todo
+
+todos_fts = Table("todos_fts", MetaData(), Column("rowid", Integer, primary_key=True))
+
+POSTGRES_CONFIG = literal_column("'simple'::regconfig")
+POSTGRES_VECTOR = func.setweight(func.to_tsvector(POSTGRES_CONFIG, Todo.title), literal_column("'A'")).op("||")(
+    func.setweight(func.to_tsvector(POSTGRES_CONFIG, Todo.description), literal_column("'B'")),
+)
+
+
+def search_terms(text: str):
+    return re.findall(r"\w+", text)
+
+
+def _sqlite_terms(terms: list[str]):
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _sqlite_match(fields):
+    return " AND ".join(
+        f"{column} : ({_sqlite_terms(terms)})" if column else f"({_sqlite_terms(terms)})" for column, terms in fields
+    )
+
+
+def _postgres_terms(terms: list[str], weight: str = ""):
+    lexemes = [f"{term}:{weight}" if weight else term for term in terms]
+    lexemes[-1] = f"{terms[-1]}:*{weight}"
+    return " & ".join(lexemes)
+
+
+def _search_fields(todo_filter):
+    fields = [("title", todo_filter.title), ("description", todo_filter.description), (None, todo_filter.q)]
+    return [(column, search_terms(value)) for column, value in fields if value]
+
+
+def search_todos(query, dialect: str, todo_filter):
+    fields = _search_fields(todo_filter)
+
+    if not fields:
+        return query
+
+    # only punctuation or whitespace: nothing can match
+    if not all(terms for _, terms in fields):
+        return query.where(false())
+
+    if dialect == "sqlite":
+        query = query.join(todos_fts, todos_fts.c.rowid == Todo.id).where(
+            literal_column("todos_fts").op("MATCH")(_sqlite_match(fields)),
+        )
+        if todo_filter.q:
+            query = query.order_by(func.bm25(literal_column("todos_fts"), 10.0, 1.0))
+        return query
+
+    if dialect == "postgresql":
+        weights = {"title": "A", "description": "B", None: ""}
+        tsquery = func.to_tsquery(
+            POSTGRES_CONFIG,
+            " & ".join(_postgres_terms(terms, weights[column]) for column, terms in fields),
+        )
+        query = query.where(POSTGRES_VECTOR.op("@@")(tsquery))
+        if todo_filter.q:
+            query = query.order_by(func.ts_rank(POSTGRES_VECTOR, tsquery).desc())
+        return query
+
+    for column, terms in fields:
+        columns = [getattr(Todo, column)] if column else [Todo.title, Todo.description]
+        for term in terms:
+            query = query.where(or_(*(column.contains(term) for column in columns)))
+
+    return query
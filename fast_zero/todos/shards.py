@@ -0,0 +1,154 @@
+import asyncio
+import bisect
+import hashlib
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from fast_zero import database
+from fast_zero.cache import TTLCache
+from fast_zero.config.settings import Settings
+from fast_zero.database import READ_METHODS, build_engine, get_session
+from fast_zero.security import CurrentUser, get_current_user
+from fast_zero.todos.models import SEARCH_DDL, Todo, TodoIdBlock, TodoShard
+
+settings = Settings()
+
+
+class HashShardMap:
+    def __init__(self, shards: int):
+        self.shards = shards
+
+    def shard_for(self, user_id: int):
+        digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+        return int.from_bytes(digest) % self.shards
+
+
+class RangeShardMap:
+    def __init__(self, shards: int, bounds: list[int]):
+        # bounds[i] is the first user_id stored on shard i + 1
+        if len(bounds) != shards - 1 or bounds != sorted(bounds):
+            raise ValueError(f"{shards} shards need {shards - 1} ascending TODO_SHARD_RANGES bounds, got {bounds}")
+        self.bounds = bounds
+
+    def shard_for(self, user_id: int):
+        return bisect.bisect_right(self.bounds, user_id)
+
+
+def build_shard_map(strategy: str, shards: int, bounds: list[int]):
+    if strategy == "range":
+        return RangeShardMap(shards, bounds)
+    return HashShardMap(shards)
+
+
+shard_engines = [build_engine(url, name=f"shard{index}") for index, url in enumerate(settings.TODO_SHARD_URLS)]
+shard_map = (
+    build_shard_map(settings.TODO_SHARD_MAP, len(shard_engines), settings.TODO_SHARD_RANGES) if shard_engines else None
+)
+
+
+class Placement(NamedTuple):
+    shard: int
+    locked: bool = False
+
+
+placements = TTLCache("todo_shards", settings.TODO_SHARD_DIRECTORY_MAX_SIZE)
+
+
+async def read_placement(conn, user_id: int):
+    row = (await conn.execute(select(TodoShard.shard, TodoShard.locked).where(TodoShard.user_id == user_id))).first()
+    return Placement(*row) if row else Placement(shard_map.shard_for(user_id))
+
+
+async def locate(user_id: int):
+    placement = placements.get(user_id)
+    if placement is None:
+        # always the primary: a lagging replica could still point at a shard the rows already left
+        async with database.engine.connect() as conn:
+            placement = await read_placement(conn, user_id)
+        placements.set(user_id, placement, settings.TODO_SHARD_DIRECTORY_TTL)
+    return placement
+
+
+async def get_todo_session(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_user),
+):
+    if not shard_engines:
+        return session
+
+    placement = await locate(user.id)
+    if placement.locked and request.method not in READ_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Todos are being moved to another shard, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    session.info["shards"] = {Todo.__tablename__: shard_engines[placement.shard]}
+    return session
+
+
+class TodoIds:
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self.next = self.end = 0
+        self.lock = asyncio.Lock()
+
+    async def take(self, count: int):
+        async with self.lock:
+            ids = []
+            while len(ids) < count:
+                if self.next >= self.end:
+                    self.next, self.end = await reserve_ids(max(self.block_size, count - len(ids)))
+                taken = min(count - len(ids), self.end - self.next)
+                ids.extend(range(self.next, self.next + taken))
+                self.next += taken
+            return ids
+
+
+async def reserve_ids(count: int):
+    # its own transaction: a block must never be handed out twice, even if the request rolls back
+    async with database.engine.begin() as conn:
+        end = await conn.scalar(
+            update(TodoIdBlock)
+            .where(TodoIdBlock.name == Todo.__tablename__)
+            .values(next_id=TodoIdBlock.next_id + count)
+            .returning(TodoIdBlock.next_id)
+        )
+    if end is None:
+        raise RuntimeError("todo ids are not initialized, run python -m fast_zero.todos.rebalance init")
+    return end - count, end
+
+
+todo_ids = TodoIds(settings.TODO_ID_BLOCK_SIZE)
+
+
+async def assign_todo_ids(todos: list):
+    # shard-local autoincrement would collide as soon as a user's todos move to another shard
+    if not shard_engines:
+        return
+
+    for todo, todo_id in zip(todos, await todo_ids.take(len(todos))):
+        if isinstance(todo, dict):
+            todo["id"] = todo_id
+        else:
+            todo.id = todo_id
+
+
+def create_shard_schema(connection):
+    if inspect(connection).has_table(Todo.__tablename__):
+        return
+
+    # shards have no users table to reference
+    table = Todo.__table__
+    table.c.state.type.create(connection, checkfirst=True)
+    connection.execute(CreateTable(table, include_foreign_key_constraints=[]))
+    for index in table.indexes:
+        connection.execute(CreateIndex(index))
+    for statement in SEARCH_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
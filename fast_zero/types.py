@@ -2,12 +2,13 @@ from typing import Annotated
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fast_zero.database import get_session
-from fast_zero.security import get_current_user
-from fast_zero.users.models import User
+from fast_zero.security import CurrentUser, get_current_user
+from fast_zero.todos.shards import get_todo_session
 
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_TodoSession = Annotated[AsyncSession, Depends(get_todo_session)]
+T_CurrentUser = Annotated[CurrentUser, Depends(get_current_user)]
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -1,104 +1,169 @@
-from fastapi import APIRouter, status
-from fastapi.exceptions import HTTPException
-from sqlalchemy import select
+import re
 
-from fast_zero.security import get_password_hash
+import orjson
+from fastapi import APIRouter, Request, Response, status
+from fastapi.exceptions import HTTPException
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from fast_zero.cache import RESPONSE_BACKENDS, CachedResponse, ResponseCache
+from fast_zero.conditional import conditional_response, weak_etag
+from fast_zero.config.settings import Settings
+from fast_zero.routing import SessionRoute
+from fast_zero.security import UNUSABLE_PASSWORD, get_password_hash, token_cache
 from fast_zero.types import T_CurrentUser, T_Session
 from fast_zero.users.models import User
 from fast_zero.users.schema import UserList, UserResponse, UserSchema
 
-user_router = APIRouter(prefix="/users", tags=["users"])
+settings = Settings()
 
+UNIQUE_COLUMN = re.compile(r"(?:users[._]|ix_users_)(username|email)")
 
-@user_router.post("/", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
-def create_user(user: UserSchema, session: T_Session):
-    exist_user = session.scalar(select(User).where((User.username == user.username) | (User.email == user.email)))
+USER_RESPONSE_COLUMNS = tuple(getattr(User, field) for field in UserResponse.model_fields)
 
-    if exist_user:
-        if exist_user.username == user.username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already exists",
-            )
-        if exist_user.email == user.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already exists",
-            )
+user_router = APIRouter(prefix="/users", tags=["users"], route_class=SessionRoute)
+
+response_cache = ResponseCache(
+    RESPONSE_BACKENDS[settings.RESPONSE_CACHE_BACKEND](
+        "users", settings.RESPONSE_CACHE_MAX_SIZE, settings.RESPONSE_CACHE_DIR
+    ),
+    ttl=settings.RESPONSE_CACHE_TTL,
+)
 
-    db_user = User(
-        **user.model_dump(exclude=("password")),
-        password=get_password_hash(user.password),
+
+def already_exists(error: IntegrityError):
+    # SQLite reports "users.username", PostgreSQL the "users_username_key" constraint;
+    # both name the index for the case-insensitive email one
+    match = UNIQUE_COLUMN.search(str(error.orig))
+    if match is None:
+        raise error
+
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{match[1].capitalize()} already exists",
     )
 
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
 
-    return db_user
+async def get_or_fill_from_primary(session: T_Session, key: str, tags: tuple[str, ...], fill):
+    # cache entries are shared and outlive the request: filled from a lagging replica right
+    # after an invalidation, they would serve stale rows for the whole TTL
+    session.info["read_only"] = False
+    return await response_cache.get_or_fill(key, tags, fill)
+
+
+@user_router.post("/", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
+async def create_user(user: UserSchema, session: T_Session):
+    # insert first, so a conflicting signup fails on the unique constraints before any argon2 work
+    try:
+        db_user = (
+            await session.execute(
+                insert(User)
+                .values(**user.model_dump(exclude={"password"}), password=UNUSABLE_PASSWORD)
+                .returning(*USER_RESPONSE_COLUMNS),
+            )
+        ).one()
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        raise already_exists(error) from error
+
+    # no transaction while the job queues and runs in the hash pool: on SQLite it would hold
+    # the write lock for every other writer; until the update the password matches nothing
+    try:
+        password = await get_password_hash(user.password)
+    except BaseException:
+        await session.execute(delete(User).where(User.id == db_user.id))
+        await session.commit()
+        raise
+
+    await session.execute(update(User).where(User.id == db_user.id).values(password=password))
+    await session.commit()
+    response_cache.invalidate("users")
+
+    return db_user._asdict()
 
 
 @user_router.get("/", response_model=UserList)
-def read_users(
+async def read_users(
     session: T_Session,
     skip: int = 0,
     limit: int = 100,
 ):
-    db_users = session.scalars(select(User).offset(skip).limit(limit)).all()
-    return {"users": db_users}
+    async def fill():
+        # plain rows: no entity hydration or identity map for a read-only page
+        rows = await session.execute(select(*USER_RESPONSE_COLUMNS).offset(skip).limit(limit))
+        return CachedResponse(orjson.dumps({"users": [row._asdict() for row in rows]}))
+
+    cached = await get_or_fill_from_primary(session, f"/users/?skip={skip}&limit={limit}", ("users",), fill)
+    return Response(cached.body, media_type="application/json")
 
 
 @user_router.get("/{user_id}", response_model=UserResponse)
-def detail_user(user_id: int, session: T_Session):
-    exist_user = session.scalar(select(User).where(User.id == user_id))
+async def detail_user(user_id: int, request: Request, session: T_Session):
+    async def fill():
+        exist_user = await session.scalar(select(User).where(User.id == user_id))
 
-    if not exist_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found!",
+        if not exist_user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found!",
+            )
+
+        return CachedResponse(
+            UserResponse.model_validate(exist_user).model_dump_json().encode(),
+            weak_etag(exist_user.id, exist_user.username, exist_user.email, exist_user.created_at),
         )
 
-    return exist_user
+    cached = await get_or_fill_from_primary(session, f"/users/{user_id}", (f"user:{user_id}",), fill)
+    response = Response(cached.body, media_type="application/json")
+    return conditional_response(request, response, cached.etag) or response
 
 
 @user_router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user: UserSchema, session: T_Session, current_user: T_CurrentUser):
+async def update_user(user_id: int, user: UserSchema, session: T_Session, current_user: T_CurrentUser):
     if current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
 
-    exist_user = session.scalar(select(User).where((User.username == user.username) | (User.email == user.email)))
+    password = await get_password_hash(user.password)
 
-    if exist_user:
-        if exist_user.username == user.username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already exists",
-            )
-        if exist_user.email == user.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already exists",
+    try:
+        db_user = (
+            await session.execute(
+                update(User)
+                .where(User.id == current_user.id)
+                .values(**user.model_dump(exclude={"password"}), password=password)
+                .returning(*USER_RESPONSE_COLUMNS),
             )
+        ).one_or_none()
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        raise already_exists(error) from error
+
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found!",
+        )
 
-    current_user.username = user.username
-    current_user.email = user.email
-    current_user.password = get_password_hash(user.password)
-    session.commit()
-    session.refresh(current_user)
+    token_cache.invalidate(current_user.id)
+    response_cache.invalidate("users", f"user:{current_user.id}")
 
-    return current_user
+    return db_user._asdict()
 
 
 @user_router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, session: T_Session, current_user: T_CurrentUser):
+async def delete_user(user_id: int, session: T_Session, current_user: T_CurrentUser):
     if current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
 
-    session.delete(current_user)
-    session.commit()
+    await session.execute(delete(User).where(User.id == current_user.id))
+    await session.commit()
+    token_cache.invalidate(current_user.id)
+    response_cache.invalidate("users", f"user:{current_user.id}")
@@ -1,9 +1,11 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr
 
 
 class UserSchema(BaseModel):
     username: str
-    email: EmailStr
+    email: Annotated[EmailStr, AfterValidator(str.lower)]
     password: str
 
 
@@ -0,0 +1,36 @@
+"""make users lower(email) index unique
+
+Revision ID: b8d2f6a41c93
+Revises: e5a7c3f19b24
+Create Date: 2026-10-18 17:42:11.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d2f6a41c93'
+down_revision: Union[str, None] = 'e5a7c3f19b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().scalars(
+        sa.text('SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1')
+    ).all()
+    if duplicates:
+        raise RuntimeError(
+            'emails that differ only in case must be merged before this migration: ' + ', '.join(duplicates)
+        )
+
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
@@ -0,0 +1,78 @@
+"""add todos full text search
+
+Revision ID: c4f0a8d2e6b1
+Revises: 7b1e5c9a2f43
+Create Date: 2026-10-18 11:03:54.120377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f0a8d2e6b1'
+down_revision: Union[str, None] = '7b1e5c9a2f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK_SIZE = 10_000
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE todos_fts USING fts5(title, description, content='todos', content_rowid='id')",
+    """CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+POSTGRESQL_DDL = [
+    """CREATE INDEX CONCURRENTLY ix_todos_search ON todos USING GIN (
+        (setweight(to_tsvector('simple'::regconfig, title), 'A')
+         || setweight(to_tsvector('simple'::regconfig, description), 'B'))
+    )""",
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+        last_id = bind.scalar(sa.text('SELECT coalesce(max(id), 0) FROM todos'))
+        for start in range(0, last_id, BACKFILL_CHUNK_SIZE):
+            op.execute(
+                sa.text(
+                    'INSERT INTO todos_fts(rowid, title, description) '
+                    'SELECT id, title, description FROM todos WHERE id > :start AND id <= :end'
+                ).bindparams(start=start, end=start + BACKFILL_CHUNK_SIZE)
+            )
+
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for statement in POSTGRESQL_DDL:
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_insert')
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_delete')
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_update')
+        op.execute('DROP TABLE IF EXISTS todos_fts')
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_todos_search')
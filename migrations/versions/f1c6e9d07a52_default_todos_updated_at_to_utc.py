@@ -0,0 +1,29 @@
+"""default todos.updated_at to utc
+
+Revision ID: f1c6e9d07a52
+Revises: b8d2f6a41c93
+Create Date: 2026-10-18 18:20:37.581904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6e9d07a52'
+down_revision: Union[str, None] = 'b8d2f6a41c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CURRENT_TIMESTAMP is already UTC on SQLite; PostgreSQL's now() is in the session time zone
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('todos', 'updated_at', server_default=sa.text("TIMEZONE('utc', CURRENT_TIMESTAMP)"))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('todos', 'updated_at', server_default=sa.text('CURRENT_TIMESTAMP'))
@@ -1,15 +1,22 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
 import factory
 import factory.fuzzy
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import StaticPool, create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import StaticPool, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from fast_zero.app import app
 from fast_zero.database import get_session, model_registry
-from fast_zero.security import get_password_hash
+from fast_zero.hashing import hash_executor
+from fast_zero.security import get_password_hash, token_cache
 from fast_zero.todos.models import Todo, TodoState
 from fast_zero.users.models import User
+from fast_zero.users.routes import response_cache
 
 
 class TodoFactory(factory.Factory):
@@ -31,6 +38,67 @@ class UserFactory(factory.Factory):
     password = factory.LazyAttribute(lambda obj: f"{obj.username}+senha")
 
 
+FULL_SCAN = re.compile(r"^SCAN (?!.*VIRTUAL TABLE)")
+
+
+@asynccontextmanager
+async def no_full_scans(session):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    for statement, parameters in statements:
+        plan = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        scans = [row.detail for row in plan if FULL_SCAN.match(row.detail)]
+        assert not scans, f"full table scan {scans} in: {statement}"
+
+
+@pytest.fixture()
+def assert_max_queries(session):
+    @contextmanager
+    def budget(limit: int):
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(session.bind.sync_engine, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            event.remove(session.bind.sync_engine, "before_cursor_execute", capture)
+
+        executed = "\n".join(statements)
+        assert len(statements) <= limit, f"{len(statements)} queries executed, budget is {limit}:\n{executed}"
+
+    return budget
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _in_process_hashing():
+    # the app's lifespan would otherwise start a process pool, re-importing the app in every worker, per TestClient
+    with ThreadPoolExecutor(max_workers=hash_executor.workers) as pool:
+        hash_executor.use(pool)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    yield
+    token_cache.clear()
+    response_cache.clear()
+
+
 @pytest.fixture()
 def client(session):
     def get_session_override():
@@ -43,45 +111,50 @@ def client(session):
     app.dependency_overrides.clear()
 
 
-@pytest.fixture()
-def session():
-    engine = create_engine(
-        "sqlite:///:memory:",
+@pytest_asyncio.fixture()
+async def session():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    model_registry.metadata.create_all(engine)
 
-    with Session(engine) as session:
+    async with engine.begin() as conn:
+        await conn.run_sync(model_registry.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
-    model_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(model_registry.metadata.drop_all)
 
+    await engine.dispose()
 
-@pytest.fixture()
-def user(session):
+
+@pytest_asyncio.fixture()
+async def user(session):
     password = "testtest"
 
     user = UserFactory(
-        password=get_password_hash(password),
+        password=await get_password_hash(password),
     )
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password  # Monkey Patch
 
     return user
 
 
-@pytest.fixture()
-def other_user(session):
+@pytest_asyncio.fixture()
+async def other_user(session):
     user = UserFactory()
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     return user
 
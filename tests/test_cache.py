@@ -0,0 +1,186 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from freezegun import freeze_time
+
+from fast_zero.cache import CachedResponse, MemoryBackend, ResponseCache, SharedMemoryBackend, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache("test", maxsize=2)
+    cache.set("a", "one", ttl=60)
+    cache.set("b", "two", ttl=60)
+    cache.get("a")
+
+    cache.set("c", "three", ttl=60)
+
+    assert cache.get("a") == "one"
+    assert cache.get("b") is None
+    assert cache.get("c") == "three"
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("test", maxsize=2)
+
+    with freeze_time("2024-01-01 12:00:00"):
+        cache.set("a", "one", ttl=30)
+
+    with freeze_time("2024-01-01 12:00:29"):
+        assert cache.get("a") == "one"
+
+    with freeze_time("2024-01-01 12:00:30"):
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_ttl_cache_invalidates_entries_by_tag():
+    cache = TTLCache("test", maxsize=10)
+    cache.set("a", "one", ttl=60, tag="user:1")
+    cache.set("b", "two", ttl=60, tag="user:1")
+    cache.set("c", "three", ttl=60, tag="user:2")
+
+    cache.invalidate("user:1")
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") == "three"
+
+
+@pytest.fixture(params=["memory", "shared"])
+def response_cache(request, tmp_path):
+    if request.param == "memory":
+        return ResponseCache(MemoryBackend("test", maxsize=8), ttl=60)
+    return ResponseCache(SharedMemoryBackend("test", maxsize=8, directory=str(tmp_path)), ttl=60)
+
+
+def counting_fill(body: bytes, delay: float = 0):
+    calls = []
+
+    async def fill():
+        calls.append(body)
+        await asyncio.sleep(delay)
+        return CachedResponse(body, etag='W/"1"')
+
+    return fill, calls
+
+
+@pytest.mark.asyncio()
+async def test_response_cache_fills_once_for_concurrent_misses(response_cache):
+    fill, calls = counting_fill(b"[]", delay=0.01)
+
+    results = await asyncio.gather(*(response_cache.get_or_fill("/users/", ("users",), fill) for _ in range(10)))
+
+    assert calls == [b"[]"]
+    assert set(results) == {CachedResponse(b"[]", 'W/"1"')}
+
+
+@pytest.mark.asyncio()
+async def test_response_cache_invalidates_by_tag(response_cache):
+    fill, calls = counting_fill(b"{}")
+    await response_cache.get_or_fill("/users/1", ("user:1",), fill)
+    await response_cache.get_or_fill("/users/2", ("user:2",), fill)
+
+    response_cache.invalidate("user:1")
+    await response_cache.get_or_fill("/users/1", ("user:1",), fill)
+    await response_cache.get_or_fill("/users/2", ("user:2",), fill)
+
+    expected_fills = 3
+    assert len(calls) == expected_fills
+
+
+@pytest.mark.asyncio()
+async def test_response_cache_discards_fill_raced_by_invalidation(response_cache):
+    async def fill():
+        response_cache.invalidate("users")
+        return CachedResponse(b"stale")
+
+    await response_cache.get_or_fill("/users/", ("users",), fill)
+    refill, calls = counting_fill(b"fresh")
+
+    assert await response_cache.get_or_fill("/users/", ("users",), refill) == CachedResponse(b"fresh", 'W/"1"')
+    assert calls == [b"fresh"]
+
+
+@pytest.mark.asyncio()
+async def test_shared_backend_is_visible_across_workers(tmp_path):
+    first = ResponseCache(SharedMemoryBackend("users", maxsize=8, directory=str(tmp_path)), ttl=60)
+    second = ResponseCache(SharedMemoryBackend("users", maxsize=8, directory=str(tmp_path)), ttl=60)
+    fill, calls = counting_fill(b"[]")
+
+    await first.get_or_fill("/users/", ("users",), fill)
+    await second.get_or_fill("/users/", ("users",), fill)
+    second.invalidate("users")
+    await first.get_or_fill("/users/", ("users",), fill)
+
+    expected_fills = 2
+    assert len(calls) == expected_fills
+
+
+def test_shared_backend_expires_and_prunes_entries(tmp_path):
+    backend = SharedMemoryBackend("users", maxsize=2, directory=str(tmp_path))
+
+    backend.set("expired", b"old", ttl=-1)
+    for key in ("a", "b", "c"):
+        backend.set(key, key.encode(), ttl=60)
+    backend.prune()
+
+    assert backend.get("expired") is None
+    assert backend.get("a") is None
+    assert backend.get("c") == b"c"
+
+
+def test_memory_backend_forgets_bumps_older_than_they_are_kept():
+    backend = MemoryBackend("users", maxsize=8)
+
+    with freeze_time("2026-01-01") as frozen:
+        backend.bump("user:1", keep=60)
+        frozen.tick(61)
+        backend.bump("user:2", keep=60)
+
+        assert backend.generation("user:1") == "0"
+        assert backend.generation("user:2") != "0"
+
+
+def test_shared_backend_prunes_old_bumps(tmp_path):
+    backend = SharedMemoryBackend("users", maxsize=8, directory=str(tmp_path))
+
+    backend.bump("user:1", keep=-1)
+    backend.bump("user:2", keep=60)
+    backend.prune()
+
+    assert backend.generation("user:1") == "0"
+    assert backend.generation("user:2") != "0"
+    assert len(list(backend.tags.iterdir())) == 1
+
+
+def test_read_users_is_served_from_cache_until_a_write(client, user, token, assert_max_queries):
+    username = user.username
+    client.get("/users/")
+
+    with assert_max_queries(0):
+        cached = client.get("/users/")
+
+    client.put(
+        f"/users/{user.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"username": "renamed", "email": "renamed@test.com", "password": "secret"},
+    )
+    refreshed = client.get("/users/")
+
+    assert cached.json()["users"][0]["username"] == username
+    assert refreshed.json()["users"][0]["username"] == "renamed"
+
+
+def test_detail_user_cache_is_invalidated_per_user(client, user, other_user, token, assert_max_queries):
+    client.get(f"/users/{user.id}")
+    client.get(f"/users/{other_user.id}")
+
+    client.delete(f"/users/{user.id}", headers={"Authorization": f"Bearer {token}"})
+
+    with assert_max_queries(0):
+        other = client.get(f"/users/{other_user.id}")
+    deleted = client.get(f"/users/{user.id}")
+
+    assert other.status_code == status.HTTP_200_OK
+    assert deleted.status_code == status.HTTP_404_NOT_FOUND
@@ -1,13 +1,96 @@
-from sqlalchemy import select
+import pytest
+from fastapi import APIRouter, FastAPI, status
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_validator
+from sqlalchemy import select, text
 
+from fast_zero import database
+from fast_zero.database import build_engine, model_registry, pool_stats
+from fast_zero.routing import SessionRoute
+from fast_zero.types import T_Session
 from fast_zero.users.models import User
 
+SQLITE_SYNCHRONOUS_NORMAL = 1
 
-def test_create_user(session):
+
+@pytest.mark.asyncio()
+async def test_create_user(session):
     new_user = User(username="alice", password="secret", email="teste@test")
     session.add(new_user)
-    session.commit()
+    await session.commit()
 
-    user = session.scalar(select(User).where(User.username == "alice"))
+    user = await session.scalar(select(User).where(User.username == "alice"))
 
     assert user.username == "alice"
+
+
+@pytest.mark.asyncio()
+async def test_sqlite_file_engine_applies_pragmas_and_pool_settings(tmp_path):
+    file_engine = build_engine(f"sqlite:///{tmp_path}/database.db", name="pragmas")
+
+    async with file_engine.connect() as conn:
+        journal_mode = await conn.scalar(text("PRAGMA journal_mode"))
+        synchronous = await conn.scalar(text("PRAGMA synchronous"))
+        stats = pool_stats(file_engine)
+
+    logger_name = file_engine.pool.logger.name
+    await file_engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == SQLITE_SYNCHRONOUS_NORMAL
+    assert stats["database"] == "pragmas"
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+    assert logger_name == "sqlalchemy.pool.impl.AsyncAdaptedQueuePool.pragmas"
+
+
+def test_pool_stats_endpoint(client):
+    response = client.get("/metrics/pool")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["database"] == "primary"
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(("route_class", "checked_out"), [(SessionRoute, 0), (APIRoute, 1)])
+async def test_session_route_releases_connection_before_serialization(tmp_path, monkeypatch, route_class, checked_out):
+    file_engine = build_engine(f"sqlite:///{tmp_path}/database.db", name="release")
+    async with file_engine.begin() as conn:
+        await conn.run_sync(model_registry.metadata.create_all)
+        await conn.execute(User.__table__.insert().values(username="alice", email="alice@test.com", password="x"))
+    monkeypatch.setattr(database, "engine", file_engine)
+
+    serialized_with = []
+
+    class Probe(BaseModel):
+        username: str
+
+        @field_validator("username", mode="before")
+        @classmethod
+        def record_pool(cls, value):
+            serialized_with.append(file_engine.pool.checkedout())
+            return value
+
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/idle")
+    async def idle(session: T_Session):
+        return {"checked_out": file_engine.pool.checkedout()}
+
+    @router.get("/users", response_model=list[Probe])
+    async def users(session: T_Session):
+        return (await session.scalars(select(User))).all()
+
+    test_app = FastAPI()
+    test_app.include_router(router)
+
+    with TestClient(test_app) as client:
+        idle_response = client.get("/idle")
+        response = client.get("/users")
+
+    await file_engine.dispose()
+
+    assert idle_response.json() == {"checked_out": 0}
+    assert response.json() == [{"username": "alice"}]
+    assert serialized_with == [checked_out]
@@ -0,0 +1,85 @@
+import json
+import os
+
+from fastapi import status
+
+from fast_zero.metrics import merge, render, snapshot
+from fast_zero.monitoring import routes
+
+
+def sample(body, line_prefix):
+    for line in body.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_endpoint_exposes_request_and_query_metrics(client, user):
+    requests = 'fast_zero_http_requests_total{method="GET",route="/users/{user_id}",status="200"}'
+    queries = 'fast_zero_http_request_queries_count{route="/users/{user_id}"}'
+    before = client.get("/metrics").text
+
+    client.get(f"/users/{user.id}")
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert sample(response.text, requests) == sample(before, requests) + 1
+    assert sample(response.text, queries) == sample(before, queries) + 1
+    assert "# TYPE fast_zero_http_request_duration_seconds histogram" in response.text
+    assert "fast_zero_db_pool_checked_out" in response.text
+    assert "fast_zero_threadpool_capacity" in response.text
+
+
+def test_unknown_paths_share_one_route_label(client):
+    client.get("/does-not-exist")
+    client.get("/neither-does-this")
+
+    body = client.get("/metrics").text
+
+    assert 'route="unmatched",status="404"' in body
+    assert "does-not-exist" not in body
+
+
+def test_render_merges_worker_snapshots():
+    worker = {
+        "jobs_total": {
+            "kind": "counter",
+            "documentation": "Jobs",
+            "labelnames": ["queue"],
+            "buckets": [],
+            "samples": [[["default"], 2.0]],
+        },
+        "job_seconds": {
+            "kind": "histogram",
+            "documentation": "Job time",
+            "labelnames": [],
+            "buckets": [0.1, 1.0],
+            "samples": [[[], {"counts": [1, 1, 0], "count": 2, "sum": 0.6}]],
+        },
+    }
+
+    body = render(merge([worker, worker]))
+
+    assert 'jobs_total{queue="default"} 4.0' in body
+    assert 'job_seconds_bucket{le="0.1"} 2' in body
+    assert 'job_seconds_bucket{le="1.0"} 4' in body
+    assert 'job_seconds_bucket{le="+Inf"} 4' in body
+    assert "job_seconds_count 4" in body
+
+
+def test_multiprocess_metrics_drop_gauges_of_dead_workers(client, tmp_path, monkeypatch):
+    dead_pid = 2**22 + 1
+    rejected_by_dead_worker = 3.0
+    families = snapshot()
+    families["fast_zero_http_requests_in_flight"]["samples"] = [[[], 7.0]]
+    families["fast_zero_hash_rejected_total"]["samples"] = [[[], rejected_by_dead_worker]]
+    (tmp_path / f"{dead_pid}.json").write_text(json.dumps(families))
+    monkeypatch.setattr(routes.settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+
+    body = client.get("/metrics").text
+
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+    assert {path.stem for path in tmp_path.glob("*.json")} == {str(dead_pid), str(os.getpid())}
+    assert sample(body, "fast_zero_http_requests_in_flight") == 1.0
+    assert sample(body, "fast_zero_hash_rejected_total") >= rejected_by_dead_worker
@@ -0,0 +1,34 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from fast_zero.app import app
+from fast_zero.profiling import ProfilingMiddleware
+
+
+def profiled_client(tmp_path, **options):
+    options = {"header": "X-Profile", "token": "let-me-in", "sample_rate": 0.0, "max_bytes": 10**7, **options}
+    return TestClient(ProfilingMiddleware(app, directory=str(tmp_path), **options))
+
+
+def test_profile_is_written_when_admin_header_matches(client, tmp_path):
+    response = profiled_client(tmp_path).get("/users/", headers={"X-Profile": "let-me-in"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (tmp_path / response.headers["x-profile-id"]).exists()
+
+
+def test_profile_is_not_written_with_wrong_header(client, tmp_path):
+    response = profiled_client(tmp_path).get("/users/", headers={"X-Profile": "guess"})
+
+    assert "x-profile-id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_profiles_are_sampled_and_pruned_to_max_bytes(client, tmp_path):
+    profiled = profiled_client(tmp_path, token="", sample_rate=1.0, max_bytes=1)
+
+    first = profiled.get("/users/")
+    second = profiled.get("/users/")
+
+    assert first.headers["x-profile-id"] != second.headers["x-profile-id"]
+    assert not list(tmp_path.glob("*.prof"))
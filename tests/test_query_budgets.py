@@ -0,0 +1,116 @@
+import pytest
+import pytest_asyncio
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from fast_zero.app import app
+from fast_zero.database import session_queries
+from fast_zero.monitoring.instrumentation import QueryCountMiddleware
+from fast_zero.users.models import User
+from tests.conftest import TodoFactory
+
+# budgets include the bearer token lookup, which is cached after the first request
+
+
+@pytest.fixture()
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture()
+async def todo(session, user):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    return todo
+
+
+def test_create_user_query_budget(client, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.post("/users/", json={"username": "alice", "email": "alice@test.com", "password": "secret"})
+
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_read_users_query_budget(client, user, assert_max_queries):
+    with assert_max_queries(1):
+        response = client.get("/users/")
+
+    assert response.status_code == status.HTTP_200_OK
+
+    with assert_max_queries(1):
+        response = client.get(f"/users/{user.id}")
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_update_user_query_budget(client, user, auth, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.put(
+            f"/users/{user.id}", json={"username": "bob", "email": "bob@test.com", "password": "secret"}, headers=auth
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_delete_user_query_budget(client, user, auth, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.delete(f"/users/{user.id}", headers=auth)
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_list_and_create_todo_query_budget(client, auth, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.get("/todos/", headers=auth)
+
+    assert response.status_code == status.HTTP_200_OK
+
+    with assert_max_queries(2):
+        response = client.post("/todos/", json={"title": "a", "description": "b", "state": "draft"}, headers=auth)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_patch_todo_query_budget(client, todo, auth, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.patch(f"/todos/{todo.id}", json={"title": "new"}, headers=auth)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_delete_todo_query_budget(client, todo, auth, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.delete(f"/todos/{todo.id}", headers=auth)
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_assert_max_queries_fails_over_budget(client, user, assert_max_queries):
+    def list_then_detail():
+        client.get("/users/")
+        client.get(f"/users/{user.id}")
+
+    with pytest.raises(AssertionError, match="2 queries executed, budget is 1"), assert_max_queries(1):
+        list_then_detail()
+
+
+def test_query_count_header(client, user):
+    debug_client = TestClient(QueryCountMiddleware(app, header="X-Query-Count"))
+
+    response = debug_client.get(f"/users/{user.id}")
+
+    assert response.headers["x-query-count"] == "1"
+    assert "x-query-count" not in client.get(f"/users/{user.id}").headers
+
+
+@pytest.mark.asyncio()
+async def test_queries_are_counted_per_session(session, user):
+    before = session_queries(session).count
+    statements = 2
+
+    await session.scalar(select(User).where(User.id == user.id))
+    await session.scalar(select(User).where(User.username == user.username))
+
+    assert session_queries(session).count == before + statements
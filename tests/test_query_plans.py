@@ -0,0 +1,55 @@
+import pytest
+from fastapi import status
+
+from fast_zero.todos.models import TodoState
+from tests.conftest import TodoFactory, no_full_scans
+
+
+@pytest.fixture()
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/todos/",
+        "/todos/?offset=2&limit=2",
+        "/todos/?limit=2&after=Mg==",
+        "/todos/?state=done",
+        "/todos/?state=done&limit=2&after=Mg==",
+        "/todos/?title=buy&description=milk",
+        "/todos/?q=milk",
+    ],
+)
+async def test_list_todo_queries_use_indexes(session, client, user, auth, url):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, state=TodoState.done))
+    await session.commit()
+
+    async with no_full_scans(session) as statements:
+        client.get(url, headers=auth)
+
+    assert statements
+
+
+@pytest.mark.asyncio()
+async def test_patch_and_delete_todo_queries_use_indexes(session, client, user, auth):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+
+    async with no_full_scans(session) as statements:
+        client.patch(f"/todos/{todo.id}", json={"title": "new"}, headers=auth)
+        client.delete(f"/todos/{todo.id}", headers=auth)
+
+    assert statements
+
+
+@pytest.mark.asyncio()
+async def test_login_query_uses_email_index(session, client, user):
+    async with no_full_scans(session) as statements:
+        response = client.post("/auth/token", data={"username": user.email.upper(), "password": user.clean_password})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert statements
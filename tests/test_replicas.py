@@ -0,0 +1,125 @@
+import pytest
+import pytest_asyncio
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from fast_zero import database
+from fast_zero.app import app as api
+from fast_zero.database import build_engine, fork_session, model_registry, routed_session, sticky_users
+from fast_zero.routing import SessionRoute
+from fast_zero.types import T_Session
+from fast_zero.users.models import User
+
+
+async def create_database(url: str, *usernames):
+    engine = build_engine(url, name=url.rsplit("/", 1)[-1])
+    async with engine.begin() as conn:
+        await conn.run_sync(model_registry.metadata.create_all)
+        for username in usernames:
+            await conn.execute(insert(User).values(username=username, email=f"{username}@test.com", password="x"))
+    return engine
+
+
+@pytest_asyncio.fixture()
+async def databases(tmp_path, monkeypatch):
+    primary = await create_database(f"sqlite:///{tmp_path}/primary.db", "primary")
+    replicas = [
+        await create_database(f"sqlite:///{tmp_path}/replica{index}.db", f"replica{index}") for index in range(2)
+    ]
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "replica_engines", replicas)
+
+    yield
+
+    sticky_users.clear()
+    for engine in (primary, *replicas):
+        await engine.dispose()
+
+
+async def usernames(session):
+    return list(await session.scalars(select(User.username).order_by(User.id)))
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures("databases")
+async def test_read_only_sessions_round_robin_over_replicas():
+    seen = []
+    for _ in range(4):
+        async with routed_session(read_only=True) as session:
+            seen.append(await usernames(session))
+
+    async with routed_session() as session:
+        primary = await usernames(session)
+
+    assert sorted(seen) == [["replica0"], ["replica0"], ["replica1"], ["replica1"]]
+    assert seen[0] != seen[1]
+    assert primary == ["primary"]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures("databases")
+async def test_writes_go_to_primary_and_pin_the_session():
+    async with routed_session(read_only=True) as session:
+        session.add(User(username="alice", email="alice@test.com", password="x"))
+        await session.commit()
+
+        assert await usernames(session) == ["primary", "alice"]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures("databases")
+async def test_user_reads_stick_to_primary_after_a_write(monkeypatch):
+    async with routed_session(user_id=1) as session:
+        session.add(User(username="alice", email="alice@test.com", password="x"))
+        await session.commit()
+
+    async with routed_session(read_only=True, user_id=1) as session:
+        writer = await usernames(session)
+    async with routed_session(read_only=True, user_id=2) as session:
+        other = await usernames(session)
+
+    sticky_users.clear()
+    async with routed_session(read_only=True, user_id=1) as session:
+        expired = await usernames(session)
+
+    assert writer == ["primary", "alice"]
+    assert other[0].startswith("replica")
+    assert expired[0].startswith("replica")
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures("databases")
+async def test_fork_session_keeps_routing():
+    async with routed_session(read_only=True) as session, fork_session(session) as forked:
+        assert (await usernames(forked))[0].startswith("replica")
+
+
+@pytest.mark.usefixtures("databases")
+def test_get_session_routes_by_http_method():
+    router = APIRouter(route_class=SessionRoute)
+
+    @router.get("/usernames")
+    async def read(session: T_Session):
+        return await usernames(session)
+
+    @router.post("/usernames")
+    async def write(session: T_Session):
+        return await usernames(session)
+
+    app = FastAPI()
+    app.include_router(router)
+
+    with TestClient(app) as client:
+        assert client.get("/usernames").json()[0].startswith("replica")
+        assert client.post("/usernames").json() == ["primary"]
+
+
+@pytest.mark.usefixtures("databases")
+def test_response_cache_is_filled_from_primary():
+    with TestClient(api) as client:
+        users = client.get("/users/").json()["users"]
+        detail = client.get(f"/users/{users[0]['id']}").json()
+
+    assert [user["username"] for user in users] == ["primary"]
+    assert detail["username"] == "primary"
@@ -1,8 +1,14 @@
-from fastapi import status
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi import HTTPException, status
 from jwt import decode
 
+from fast_zero.cache import CACHE_REQUESTS
 from fast_zero.config.settings import Settings
-from fast_zero.security import create_access_token
+from fast_zero.hashing import HASH_DURATION, HASH_REJECTED, HashingExecutor
+from fast_zero.security import create_access_token, get_password_hash, token_cache, verify_password
 
 settings = Settings()
 
@@ -46,3 +52,64 @@ def test_should_be_raise_exception_when_claimms_sub_is_not_valid_user_email(clie
 
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
     assert response.json() == {"detail": "Could not validate credentials"}
+
+
+@pytest.mark.asyncio()
+async def test_password_hash_runs_in_executor_and_records_latency():
+    verify_duration = HASH_DURATION.labels(operation="verify")
+    observed = verify_duration.count
+
+    hashed = await get_password_hash("secret")
+
+    assert hashed != "secret"
+    assert await verify_password("secret", hashed)
+    assert not await verify_password("wrong", hashed)
+    assert verify_duration.count == observed + 2
+
+
+@pytest.mark.asyncio()
+async def test_hashing_executor_should_be_raise_503_when_queue_is_full():
+    executor = HashingExecutor(workers=1, queue_size=0)
+    executor.pending = 1
+    rejected = HASH_REJECTED.labels().value
+
+    with pytest.raises(HTTPException) as exc_info:
+        await executor.run("hash", str, "secret")
+
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert exc_info.value.headers == {"Retry-After": "1"}
+    assert HASH_REJECTED.labels().value == rejected + 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio()
+async def test_hashing_executor_should_replace_a_broken_pool():
+    executor = HashingExecutor(workers=1, queue_size=0)
+
+    with pytest.raises(BrokenProcessPool):
+        await executor.run("hash", os._exit, 1)
+
+    assert await executor.run("hash", str, "secret") == "secret"
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+def test_current_user_is_served_from_token_cache(client, user, token):
+    hits = CACHE_REQUESTS.labels(cache="token", result="hit")
+    observed = hits.value
+
+    client.post("/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+    client.post("/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+
+    assert hits.value == observed + 1
+    assert len(token_cache) == 1
+
+
+def test_token_cache_is_invalidated_when_user_is_deleted(client, user, token):
+    client.post("/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+
+    response = client.delete(f"/users/{user.id}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.post("/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
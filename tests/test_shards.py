@@ -0,0 +1,148 @@
+import pytest
+import pytest_asyncio
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from fast_zero import database
+from fast_zero.app import app
+from fast_zero.database import build_engine, model_registry
+from fast_zero.security import create_access_token
+from fast_zero.todos import shards
+from fast_zero.todos.models import Todo
+from fast_zero.todos.rebalance import init_shards, move_user, place
+from fast_zero.todos.shards import HashShardMap, RangeShardMap, TodoIds, build_shard_map
+from fast_zero.users.models import User
+
+SHARDS = 3
+
+
+@pytest_asyncio.fixture()
+async def sharded(tmp_path, monkeypatch):
+    primary = build_engine(f"sqlite:///{tmp_path}/primary.db", name="primary-test")
+    async with primary.begin() as conn:
+        await conn.run_sync(model_registry.metadata.create_all)
+        user_id = (
+            await conn.execute(
+                insert(User).values(username="alice", email="alice@test.com", password="x").returning(User.id)
+            )
+        ).scalar_one()
+
+    engines = [build_engine(f"sqlite:///{tmp_path}/shard{index}.db", name=f"shard{index}") for index in range(SHARDS)]
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(shards, "shard_engines", engines)
+    monkeypatch.setattr(shards, "shard_map", HashShardMap(SHARDS))
+    monkeypatch.setattr(shards, "todo_ids", TodoIds(block_size=2))
+    await init_shards()
+
+    yield user_id
+
+    shards.placements.clear()
+    for engine in (primary, *engines):
+        await engine.dispose()
+
+
+@pytest.fixture()
+def sharded_client(sharded):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'alice@test.com'})}"}
+    with TestClient(app, headers=headers) as client:
+        yield client
+
+
+async def todo_ids_by_shard(user_id: int):
+    found = []
+    for engine in shards.shard_engines:
+        async with engine.connect() as conn:
+            found.append(list(await conn.scalars(select(Todo.id).where(Todo.user_id == user_id).order_by(Todo.id))))
+    return found
+
+
+def create_todos(client, count: int):
+    payload = {
+        "todos": [{"title": f"todo {index}", "description": "sharded", "state": "todo"} for index in range(count)]
+    }
+    response = client.post("/todos/batch", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    return [result["id"] for result in response.json()["results"]]
+
+
+def test_shard_maps():
+    hash_map = HashShardMap(4)
+    range_map = build_shard_map("range", 3, [100, 1_000])
+    expected_shards = 4
+
+    assert hash_map.shard_for(42) == HashShardMap(4).shard_for(42)
+    assert len({hash_map.shard_for(user_id) for user_id in range(100)}) == expected_shards
+    assert [range_map.shard_for(user_id) for user_id in (1, 99, 100, 999, 1_000, 10**6)] == [0, 0, 1, 1, 2, 2]
+
+    with pytest.raises(ValueError, match="3 shards need 2 ascending"):
+        RangeShardMap(3, [1_000, 100])
+
+
+@pytest.mark.asyncio()
+async def test_todos_are_stored_on_the_users_shard(sharded, sharded_client):
+    user_id = sharded
+    home = shards.shard_map.shard_for(user_id)
+
+    ids = create_todos(sharded_client, 3)
+    response = sharded_client.post("/todos/", json={"title": "one more", "description": "sharded", "state": "todo"})
+    ids.append(response.json()["id"])
+
+    stored = await todo_ids_by_shard(user_id)
+    listed = sharded_client.get("/todos/").json()["todos"]
+    searched = sharded_client.get("/todos/?q=more").json()["todos"]
+    patched = sharded_client.patch(f"/todos/{ids[0]}", json={"state": "done"})
+    deleted = sharded_client.delete(f"/todos/{ids[1]}")
+
+    assert stored[home] == ids
+    assert sum(map(len, stored)) == len(ids)
+    assert [todo["id"] for todo in listed] == ids
+    assert [todo["id"] for todo in searched] == [ids[-1]]
+    assert patched.json()["state"] == "done"
+    assert deleted.status_code == status.HTTP_204_NO_CONTENT
+    assert (await todo_ids_by_shard(user_id))[home] == [ids[0], *ids[2:]]
+
+
+@pytest.mark.asyncio()
+async def test_move_user_keeps_todos_and_ids(sharded, sharded_client):
+    user_id = sharded
+    source = shards.shard_map.shard_for(user_id)
+    target = (source + 1) % SHARDS
+    ids = create_todos(sharded_client, 5)
+
+    moved = await move_user(user_id, target, batch_size=2, drain=0, settle=0)
+    shards.placements.clear()
+
+    stored = await todo_ids_by_shard(user_id)
+    listed = sharded_client.get("/todos/").json()["todos"]
+    response = sharded_client.post("/todos/", json={"title": "after", "description": "move", "state": "todo"})
+    new_id = response.json()["id"]
+
+    assert moved == len(ids)
+    assert stored[source] == []
+    assert stored[target] == ids
+    assert [todo["id"] for todo in listed] == ids
+    assert new_id > max(ids)
+    assert (await todo_ids_by_shard(user_id))[target] == [*ids, new_id]
+
+    assert await move_user(user_id, source, drain=0, settle=0) == len(ids) + 1
+    assert (await shards.locate(user_id)).shard == target  # still cached
+    shards.placements.clear()
+    assert (await shards.locate(user_id)).shard == source
+
+
+@pytest.mark.asyncio()
+async def test_writes_are_rejected_while_the_user_is_moving(sharded, sharded_client):
+    user_id = sharded
+    create_todos(sharded_client, 1)
+
+    await place(user_id, shards.shard_map.shard_for(user_id), locked=True)
+    shards.placements.clear()
+
+    write = sharded_client.post("/todos/", json={"title": "blocked", "description": "move", "state": "todo"})
+    read = sharded_client.get("/todos/")
+
+    assert write.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert write.headers["Retry-After"] == "1"
+    assert read.status_code == status.HTTP_200_OK
+    assert len(read.json()["todos"]) == 1
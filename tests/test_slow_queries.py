@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from fast_zero.monitoring import slow_queries
+from fast_zero.monitoring.slow_queries import SLOW_QUERIES_DROPPED, SlowQueryLog, redact
+from fast_zero.users.models import User
+
+
+@pytest.fixture()
+def slow_log(tmp_path, monkeypatch):
+    def configure(**options):
+        options = {
+            "threshold_ms": 0.000001,
+            "path": str(tmp_path / "slow.log"),
+            "max_bytes": 10**6,
+            "backup_count": 1,
+            "rate": 0.0,
+            "burst": 100,
+            "explain": True,
+            **options,
+        }
+        log = SlowQueryLog(**options)
+        monkeypatch.setattr(slow_queries, "slow_query_log", log)
+        return log
+
+    return configure
+
+
+def read_entries(log):
+    if not log.path.exists():
+        return []
+    return [json.loads(line) for line in log.path.read_text().splitlines()]
+
+
+def test_redact_keeps_only_parameter_types():
+    assert redact(("alice", 1)) == ["str", "int"]
+    assert redact({"email": "a@b.c"}) == {"email": "str"}
+
+
+@pytest.mark.asyncio()
+async def test_slow_select_is_logged_with_query_plan(session, user, slow_log):
+    log = slow_log()
+
+    await session.scalar(select(User).where(User.email == user.email))
+    await asyncio.gather(*log.pending)
+
+    [entry] = read_entries(log)
+    assert entry["parameters"] == ["str"]
+    assert user.email not in json.dumps(entry)
+    assert entry["route"] is None
+    assert any("users" in str(step) for step in entry["plan"])
+
+
+@pytest.mark.asyncio()
+async def test_fast_queries_are_not_logged(session, user, slow_log):
+    log = slow_log(threshold_ms=60_000)
+
+    await session.scalar(select(User).where(User.email == user.email))
+
+    assert not read_entries(log)
+
+
+@pytest.mark.asyncio()
+async def test_slow_queries_are_rate_limited(session, user, slow_log):
+    log = slow_log(burst=1, explain=False)
+    dropped = SLOW_QUERIES_DROPPED.labels().value
+
+    await session.scalar(select(User).where(User.id == user.id))
+    await session.scalar(select(User).where(User.id == user.id))
+
+    assert len(read_entries(log)) == 1
+    assert SLOW_QUERIES_DROPPED.labels().value == dropped + 1
+
+
+def test_slow_query_records_originating_route(client, user, slow_log):
+    log = slow_log(explain=False)
+
+    client.get(f"/users/{user.id}")
+
+    [entry] = read_entries(log)
+    assert entry["method"] == "GET"
+    assert entry["route"] == "/users/{user_id}"
@@ -1,7 +1,13 @@
+import csv
+import io
+import json
+
 import freezegun
+import pytest
 from fastapi import status
 
-from fast_zero.todos.models import TodoState
+from fast_zero.todos import routes as todo_routes
+from fast_zero.todos.models import Todo, TodoState
 from tests.conftest import TodoFactory
 
 
@@ -25,11 +31,12 @@ def test_create_todo(client, token):
     assert response.json()["state"] == payload["state"]
 
 
-def test_list_todos_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_list_todos_should_return_5_todos(session, client, user, token):
     expected_todos = 5
 
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         "/todos/",
@@ -39,11 +46,34 @@ def test_list_todos_should_return_5_todos(session, client, user, token):
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_pagination_should_return_2_todos(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_list_todos_should_not_load_orm_entities(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    await session.refresh(todo)
+    expected = {
+        "title": todo.title,
+        "description": todo.description,
+        "state": todo.state.value,
+        "id": todo.id,
+        "created_at": todo.created_at.isoformat(),
+        "updated_at": todo.updated_at.isoformat(),
+    }
+    session.expunge_all()
+
+    response = client.get("/todos/", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.json()["todos"] == [expected]
+    assert not any(isinstance(entity, Todo) for entity in session.identity_map.values())
+
+
+@pytest.mark.asyncio()
+async def test_list_todos_pagination_should_return_2_todos(session, client, user, token):
     expected_todos = 2
 
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         "/todos/?offset=1&limit=2",
@@ -53,11 +83,48 @@ def test_list_todos_pagination_should_return_2_todos(session, client, user, toke
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todo_filter_title_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_list_todos_cursor_pagination_should_walk_all_todos(session, client, user, token):
+    expected_todos = 5
+
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    seen = []
+    url = "/todos/?limit=2"
+    while url:
+        data = client.get(url, headers={"Authorization": f"Bearer {token}"}).json()
+        seen.extend(todo["id"] for todo in data["todos"])
+        url = data["next_cursor"] and f"/todos/?limit=2&after={data['next_cursor']}"
+
+    assert seen == sorted(seen)
+    assert len(set(seen)) == expected_todos
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        todo_routes.encode_cursor(-1),
+        todo_routes.encode_cursor(2**64),
+    ],
+)
+def test_list_todos_should_be_raise_with_invalid_cursor(client, token, cursor):
+    response = client.get(
+        f"/todos/?after={cursor}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.asyncio()
+async def test_list_todo_filter_title_should_return_5_todos(session, client, user, token):
     expected_todos = 5
 
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id, title="Test todo 1"))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, title="Test todo 1"))
+    await session.commit()
 
     response = client.get(
         "/todos/?title=Test todo 1",
@@ -67,11 +134,12 @@ def test_list_todo_filter_title_should_return_5_todos(session, client, user, tok
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todo_filter_description_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_list_todo_filter_description_should_return_5_todos(session, client, user, token):
     expected_todos = 5
 
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id, description="description"))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, description="description"))
+    await session.commit()
 
     response = client.get(
         "/todos/?description=desc",
@@ -81,11 +149,12 @@ def test_list_todo_filter_description_should_return_5_todos(session, client, use
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todo_filter_state_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_list_todo_filter_state_should_return_5_todos(session, client, user, token):
     expected_todos = 5
 
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id, state=TodoState.draft))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, state=TodoState.draft))
+    await session.commit()
 
     response = client.get(
         "/todos/?state=draft",
@@ -95,10 +164,87 @@ def test_list_todo_filter_state_should_return_5_todos(session, client, user, tok
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_combined_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_list_todo_search_should_rank_title_matches_first(session, client, user, token):
+    session.add_all([
+        TodoFactory(user_id=user.id, title="Weekly review", description="groceries and bills"),
+        TodoFactory(user_id=user.id, title="Buy groceries", description="milk and bread"),
+        TodoFactory(user_id=user.id, title="Call mom", description="birthday"),
+    ])
+    await session.commit()
+
+    response = client.get(
+        "/todos/?q=grocer",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    titles = [todo["title"] for todo in response.json()["todos"]]
+    assert titles == ["Buy groceries", "Weekly review"]
+
+
+@pytest.mark.asyncio()
+async def test_list_todo_search_should_follow_patched_todos(session, client, user, token):
+    todo = TodoFactory(user_id=user.id, title="Old title")
+    session.add(todo)
+    await session.commit()
+
+    client.patch(
+        f"/todos/{todo.id}",
+        json={"title": "Renamed"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    old = client.get("/todos/?q=old", headers={"Authorization": f"Bearer {token}"})
+    new = client.get("/todos/?q=renamed", headers={"Authorization": f"Bearer {token}"})
+
+    assert old.json()["todos"] == []
+    assert [todo["title"] for todo in new.json()["todos"]] == ["Renamed"]
+
+
+@pytest.mark.asyncio()
+async def test_list_todo_search_without_terms_should_return_no_todos(session, client, user, token):
+    session.add(TodoFactory(user_id=user.id, title="Buy groceries"))
+    await session.commit()
+
+    response = client.get(
+        "/todos/?q=%20-!",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["todos"] == []
+
+
+@pytest.mark.asyncio()
+async def test_list_todo_search_should_page_with_offset_only(session, client, user, token):
+    page_size = 2
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, title="Buy milk"))
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get(f"/todos/?q=milk&limit={page_size}", headers=headers).json()
+    second = client.get(f"/todos/?q=milk&limit={page_size}&offset={page_size}", headers=headers).json()
+
+    assert first["next_cursor"] is None
+    assert len(first["todos"]) == page_size
+    assert len(second["todos"]) == 1
+
+
+def test_list_todo_search_should_be_raise_with_cursor(client, token):
+    response = client.get(
+        "/todos/?q=milk&after=MQ==",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Cursor pagination is not supported with q"}
+
+
+@pytest.mark.asyncio()
+async def test_list_todos_filter_combined_should_return_5_todos(session, client, user, token):
     expected_todo = 5
 
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             5,
             user_id=user.id,
@@ -107,7 +253,7 @@ def test_list_todos_filter_combined_should_return_5_todos(session, client, user,
             state=TodoState.done,
         )
     )
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             3,
             user_id=user.id,
@@ -117,7 +263,7 @@ def test_list_todos_filter_combined_should_return_5_todos(session, client, user,
         )
     )
 
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?title=Test todo combined&description=combined&state=done",
@@ -129,11 +275,12 @@ def test_list_todos_filter_combined_should_return_5_todos(session, client, user,
     assert len(response.json()["todos"]) == expected_todo
 
 
-def test_delete_todo(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_delete_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.delete(
         f"/todos/{todo.id}",
@@ -145,6 +292,94 @@ def test_delete_todo(session, client, user, token):
     assert response.status_code == status.HTTP_204_NO_CONTENT
 
 
+@pytest.mark.asyncio()
+async def test_list_todos_should_honor_if_none_match(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    etag = client.get("/todos/", headers=headers).headers["etag"]
+    cached = client.get("/todos/", headers={**headers, "If-None-Match": etag})
+
+    assert etag.startswith('W/"')
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not cached.content
+    assert cached.headers["etag"] == etag
+
+    client.patch(f"/todos/{todo.id}", json={"title": "changed"}, headers=headers)
+    patched = client.get("/todos/", headers={**headers, "If-None-Match": etag})
+
+    assert patched.status_code == status.HTTP_200_OK
+    assert patched.headers["etag"] != etag
+
+    client.delete(f"/todos/{todo.id}", headers=headers)
+    deleted = client.get("/todos/", headers={**headers, "If-None-Match": patched.headers["etag"]})
+
+    assert deleted.status_code == status.HTTP_200_OK
+    assert deleted.json()["todos"] == []
+
+
+@pytest.mark.asyncio()
+async def test_list_todos_etag_should_change_when_an_older_todo_is_deleted(session, client, user, token):
+    older, newer = TodoFactory(user_id=user.id), TodoFactory(user_id=user.id)
+    session.add_all([older, newer])
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    etag = client.get("/todos/", headers=headers).headers["etag"]
+    client.delete(f"/todos/{older.id}", headers=headers)
+    response = client.get("/todos/", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [todo["id"] for todo in response.json()["todos"]] == [newer.id]
+
+
+@pytest.mark.asyncio()
+async def test_list_todos_fast_json_should_match_default_response(session, client, user, token, monkeypatch):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    default = client.get("/todos/?limit=2", headers=headers)
+    monkeypatch.setattr(todo_routes.settings, "FAST_JSON_RESPONSES", True)
+    fast = client.get("/todos/?limit=2", headers=headers)
+
+    assert fast.status_code == status.HTTP_200_OK
+    assert fast.json() == default.json()
+    assert fast.headers["etag"] == default.headers["etag"]
+    assert fast.headers["content-type"] == "application/json"
+
+
+@pytest.mark.asyncio()
+async def test_list_todos_should_ignore_if_modified_since(session, client, user, token):
+    session.add(TodoFactory(user_id=user.id))
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/todos/", headers={**headers, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "last-modified" not in response.headers
+
+
+@pytest.mark.asyncio()
+async def test_patch_todo_batch_should_bump_updated_at(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    await session.refresh(todo)
+    created = todo.updated_at.isoformat()
+
+    response = client.patch(
+        "/todos/batch",
+        json={"todos": [{"id": todo.id, "title": "changed"}]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.json()["results"][0]["todo"]["updated_at"] > created
+
+
 def test_delete_todo_should_be_raise_with_not_exist_todo(client, token):
     response = client.delete(
         "/todos/10",
@@ -157,11 +392,12 @@ def test_delete_todo_should_be_raise_with_not_exist_todo(client, token):
     assert response.json() == {"detail": "Task not found"}
 
 
-def test_patch_todo(session, client, user, token):
+@pytest.mark.asyncio()
+async def test_patch_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.patch(
         f"/todos/{todo.id}",
@@ -172,6 +408,37 @@ def test_patch_todo(session, client, user, token):
     assert response.json()["title"] == "teste!"
 
 
+@pytest.mark.asyncio()
+async def test_patch_todo_should_bump_updated_at_without_changes(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    await session.refresh(todo)
+    created = todo.updated_at.isoformat()
+
+    response = client.patch(f"/todos/{todo.id}", json={}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == todo.title
+    assert response.json()["updated_at"] > created
+
+
+@pytest.mark.asyncio()
+async def test_patch_and_delete_should_not_touch_todos_from_other_user(session, client, other_user, token):
+    todo = TodoFactory(user_id=other_user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    patched = client.patch(f"/todos/{todo.id}", json={"title": "mine"}, headers=headers)
+    deleted = client.delete(f"/todos/{todo.id}", headers=headers)
+
+    assert patched.status_code == status.HTTP_404_NOT_FOUND
+    assert deleted.status_code == status.HTTP_404_NOT_FOUND
+    await session.refresh(todo)
+    assert todo.title != "mine"
+
+
 def test_patch_should_be_raise_with_not_exist_todo(client, token):
     response = client.patch(
         "/todos/10",
@@ -181,3 +448,256 @@ def test_patch_should_be_raise_with_not_exist_todo(client, token):
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == {"detail": "Task not found"}
+
+
+@pytest.mark.asyncio()
+async def test_list_todos_should_not_return_todos_from_other_user(session, client, other_user, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=other_user.id))
+    await session.commit()
+
+    response = client.get(
+        "/todos/",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.json()["todos"] == []
+
+
+def test_list_todos_should_be_raise_when_not_authenticated(client):
+    response = client.get("/todos/")
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_create_todo_batch(client, token):
+    payload = {
+        "todos": [
+            {"title": "first", "description": "first description", "state": "draft"},
+            {"title": "second", "description": "second description", "state": "todo"},
+        ]
+    }
+
+    response = client.post("/todos/batch", json=payload, headers={"Authorization": f"Bearer {token}"})
+
+    results = response.json()["results"]
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["status"] for result in results] == [status.HTTP_201_CREATED, status.HTTP_201_CREATED]
+    assert [result["todo"]["title"] for result in results] == ["first", "second"]
+
+
+def test_create_todo_batch_should_be_raise_when_batch_is_too_large(client, token, monkeypatch):
+    monkeypatch.setattr(todo_routes.settings, "TODO_BATCH_MAX_SIZE", 1)
+    todo = {"title": "title", "description": "description", "state": "draft"}
+
+    response = client.post(
+        "/todos/batch",
+        json={"todos": [todo, todo]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json() == {"detail": "Batch size is limited to 1 items"}
+
+
+@pytest.mark.asyncio()
+async def test_patch_todo_batch_should_only_update_owned_todos(session, client, user, other_user, token):
+    mine = TodoFactory(user_id=user.id, state=TodoState.draft)
+    others = TodoFactory(user_id=other_user.id, title="untouched")
+    session.add_all([mine, others])
+    await session.commit()
+
+    response = client.patch(
+        "/todos/batch",
+        json={"todos": [{"id": mine.id, "title": "patched", "state": "done"}, {"id": others.id, "title": "hacked"}]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    results = response.json()["results"]
+    assert results[0]["status"] == status.HTTP_200_OK
+    assert results[0]["todo"]["title"] == "patched"
+    assert results[0]["todo"]["state"] == "done"
+    assert results[1] == {
+        "id": others.id,
+        "status": status.HTTP_404_NOT_FOUND,
+        "detail": "Task not found",
+        "todo": None,
+    }
+
+    await session.refresh(others)
+    assert others.title == "untouched"
+
+
+@pytest.mark.asyncio()
+async def test_patch_todo_batch_should_reject_null_fields_per_item(session, client, user, token):
+    valid, invalid = TodoFactory(user_id=user.id), TodoFactory(user_id=user.id, title="kept")
+    session.add_all([valid, invalid])
+    await session.commit()
+
+    response = client.patch(
+        "/todos/batch",
+        json={"todos": [{"id": valid.id, "title": "patched"}, {"id": invalid.id, "title": None, "state": None}]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    results = response.json()["results"]
+    assert response.status_code == status.HTTP_200_OK
+    assert results[0]["todo"]["title"] == "patched"
+    assert results[1] == {
+        "id": invalid.id,
+        "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+        "detail": "state, title may not be null",
+        "todo": None,
+    }
+
+    await session.refresh(invalid)
+    assert invalid.title == "kept"
+
+
+@pytest.mark.asyncio()
+async def test_delete_todo_batch_should_only_delete_owned_todos(session, client, user, other_user, token):
+    mine = TodoFactory(user_id=user.id)
+    others = TodoFactory(user_id=other_user.id)
+    session.add_all([mine, others])
+    await session.commit()
+
+    response = client.request(
+        "DELETE",
+        "/todos/batch",
+        json={"ids": [mine.id, others.id]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert [result["status"] for result in response.json()["results"]] == [
+        status.HTTP_204_NO_CONTENT,
+        status.HTTP_404_NOT_FOUND,
+    ]
+    assert await session.get(Todo, others.id, populate_existing=True)
+
+
+@pytest.mark.asyncio()
+async def test_export_todos_as_ndjson_should_honor_filters(session, client, user, token):
+    expected_todos = 3
+
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, state=TodoState.done))
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.draft))
+    await session.commit()
+
+    response = client.get("/todos/export?state=done", headers={"Authorization": f"Bearer {token}"})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(lines) == expected_todos
+    assert {line["state"] for line in lines} == {"done"}
+
+
+@pytest.mark.asyncio()
+async def test_export_todos_as_csv(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, title="exported"))
+    await session.commit()
+
+    response = client.get("/todos/export?format=csv", headers={"Authorization": f"Bearer {token}"})
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert response.headers["content-type"].startswith("text/csv")
+    assert [row["title"] for row in rows] == ["exported", "exported"]
+
+
+def test_import_todos_from_ndjson_should_report_rejected_lines(client, token, monkeypatch):
+    expected_accepted = 3
+    expected_rejected = 2
+
+    monkeypatch.setattr(todo_routes.settings, "TODO_IMPORT_BATCH_SIZE", 2)
+    body = "\n".join([
+        json.dumps({"title": "one", "description": "first", "state": "todo"}),
+        json.dumps({"title": "two", "description": "second", "state": "not-a-state"}),
+        "",
+        "{not json",
+        json.dumps({"title": "three", "description": "third", "state": "done"}),
+        json.dumps({"title": "four", "description": "fourth", "state": "draft"}),
+    ])
+
+    response = client.post(
+        "/todos/import",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"},
+    )
+
+    data = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert data["accepted"] == expected_accepted
+    assert data["rejected"] == expected_rejected
+    assert [error["line"] for error in data["errors"]] == [2, 4]
+    assert data["errors"][1]["detail"] == "Invalid JSON"
+
+    listed = client.get("/todos/", headers={"Authorization": f"Bearer {token}"})
+    assert [todo["title"] for todo in listed.json()["todos"]] == ["one", "three", "four"]
+
+
+def test_import_todos_should_reject_lines_with_invalid_utf8(client, token):
+    body = b"\n".join([
+        json.dumps({"title": "one", "description": "first", "state": "todo"}).encode(),
+        b'{"title": "\xff", "description": "broken", "state": "todo"}',
+        json.dumps({"title": "caf\u00e9", "description": "third", "state": "done"}, ensure_ascii=False).encode(),
+    ])
+
+    response = client.post(
+        "/todos/import",
+        content=body,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.json() == {
+        "accepted": 2,
+        "rejected": 1,
+        "errors": [{"line": 2, "detail": "Invalid UTF-8"}],
+    }
+
+
+def test_import_todos_from_csv(client, token):
+    body = 'title,description,state\nfirst,from csv,todo\nbroken,row\nsecond,"with, comma",done\n'
+
+    response = client.post(
+        "/todos/import",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"},
+    )
+
+    assert response.json() == {
+        "accepted": 2,
+        "rejected": 1,
+        "errors": [{"line": 3, "detail": "Invalid CSV row"}],
+    }
+
+
+def test_import_todos_from_csv_should_keep_newlines_in_quoted_fields(client, token):
+    body = 'title,description,state\n"multi\nline",desc,todo\nbroken,row\nlast,"a ""quoted""\nvalue",done\n'
+
+    response = client.post(
+        "/todos/import",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"},
+    )
+    listed = client.get("/todos/", headers={"Authorization": f"Bearer {token}"}).json()["todos"]
+
+    assert response.json() == {
+        "accepted": 2,
+        "rejected": 1,
+        "errors": [{"line": 4, "detail": "Invalid CSV row"}],
+    }
+    assert [(todo["title"], todo["description"]) for todo in listed] == [
+        ("multi\nline", "desc"),
+        ("last", 'a "quoted"\nvalue'),
+    ]
+
+
+def test_import_todos_from_csv_should_ignore_a_bom(client, token):
+    body = "\ufefftitle,description,state\r\nfirst,from excel,todo\r\n"
+
+    response = client.post(
+        "/todos/import",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"},
+    )
+
+    assert response.json() == {"accepted": 1, "rejected": 0, "errors": []}
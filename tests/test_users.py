@@ -1,5 +1,16 @@
-from fastapi import status
-
+import sqlite3
+
+import pytest
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+
+from fast_zero import database
+from fast_zero.app import app
+from fast_zero.database import build_engine, model_registry
+from fast_zero.security import UNUSABLE_PASSWORD, verify_password
+from fast_zero.users import routes
+from fast_zero.users.models import User
 from fast_zero.users.schema import UserResponse
 
 
@@ -55,6 +66,93 @@ def test_create_user_raise_400_when_email_if_exists(client, user):
     assert response.json() == expected
 
 
+def test_create_user_should_store_email_in_lowercase(client):
+    payload = {"username": "bob", "email": "Bob@Test.com", "password": "password"}
+
+    response = client.post("/users/", json=payload)
+
+    assert response.json()["email"] == "bob@test.com"
+
+
+@pytest.mark.asyncio()
+async def test_create_user_raise_400_when_email_differs_only_in_case(session, client):
+    session.add(User(username="bob", email="Bob@Test.com", password="x"))
+    await session.commit()
+
+    response = client.post("/users/", json={"username": "other", "email": "bob@test.com", "password": "password"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Email already exists"}
+
+
+def test_create_user_should_not_hash_password_on_conflict(client, user, monkeypatch):
+    async def get_password_hash(password):
+        raise AssertionError("password hashed for a conflicting signup")
+
+    monkeypatch.setattr(routes, "get_password_hash", get_password_hash)
+
+    response = client.post(
+        "/users/",
+        json={"username": user.username, "email": "test@test.com", "password": "password"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Username already exists"}
+
+
+@pytest.mark.asyncio()
+async def test_create_user_should_not_keep_the_account_when_hashing_fails(session, client, monkeypatch):
+    async def get_password_hash(password):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    monkeypatch.setattr(routes, "get_password_hash", get_password_hash)
+
+    response = client.post("/users/", json={"username": "bob", "email": "bob@test.com", "password": "password"})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert await session.scalar(select(func.count(User.id))) == 0
+
+
+def test_create_user_should_not_hold_a_transaction_while_hashing(tmp_path, monkeypatch):
+    path = tmp_path / "database.db"
+    schema_engine = create_engine(f"sqlite:///{path}")
+    model_registry.metadata.create_all(schema_engine)
+    schema_engine.dispose()
+    monkeypatch.setattr(database, "engine", build_engine(f"sqlite:///{path}", name="signup"))
+
+    async def get_password_hash(password):
+        # another writer while the hash runs: blocked if the signup kept its write lock
+        with sqlite3.connect(path, timeout=0.5) as conn:
+            conn.execute("INSERT INTO users (username, email, password) VALUES ('other', 'other@test.com', 'x')")
+        return "hashed"
+
+    monkeypatch.setattr(routes, "get_password_hash", get_password_hash)
+
+    with TestClient(app) as client:
+        response = client.post("/users/", json={"username": "bob", "email": "bob@test.com", "password": "password"})
+
+    with sqlite3.connect(path) as conn:
+        users = conn.execute("SELECT username, password FROM users ORDER BY id").fetchall()
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert users == [("bob", "hashed"), ("other", "x")]
+
+
+def test_created_user_should_be_able_to_login(client):
+    payload = {"username": "testusername", "email": "test@test.com", "password": "password"}
+    client.post("/users/", json=payload)
+
+    response = client.post("auth/token", data={"username": payload["email"], "password": payload["password"]})
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio()
+async def test_unusable_password_should_never_verify():
+    assert not await verify_password("!", UNUSABLE_PASSWORD)
+    assert not await verify_password("", UNUSABLE_PASSWORD)
+
+
 def test_read_users_is_success(client):
     response = client.get("/users/")
 
@@ -91,6 +189,25 @@ def test_detail_users_is_success(client, user):
     assert response.json() == expected
 
 
+def test_detail_users_should_honor_if_none_match(client, user, token):
+    etag = client.get(f"/users/{user.id}").headers["etag"]
+
+    cached = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not cached.content
+
+    client.put(
+        f"/users/{user.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"username": "renamed", "email": "renamed@test.com", "password": "secret"},
+    )
+    changed = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.json()["username"] == "renamed"
+
+
 def test_detail_users_should_be_raise_excetion_when_user_id_is_not_valid(client):
     response = client.get("/users/2")
 
@@ -152,10 +269,11 @@ def test_update_users_should_be_raise_excetion_when_user_not_authorization(clien
 def test_update_users_should_be_raise_excetion_when_username_already_exists(
     client,
     user,
+    other_user,
     token,
 ):
     payload = {
-        "username": user.username,
+        "username": other_user.username,
         "email": "test@newtest.com",
         "password": "password",
     }
@@ -180,11 +298,12 @@ def test_update_users_should_be_raise_excetion_when_username_already_exists(
 def test_update_users_should_be_raise_excetion_when_email_already_exists(
     client,
     user,
+    other_user,
     token,
 ):
     payload = {
         "username": "newusername",
-        "email": user.email,
+        "email": other_user.email,
         "password": "password",
     }
 